@@ -1,12 +1,13 @@
 """Cache module
 
-Provides LRU cache and conversation cache implementations.
+Provides LRU (plain and frequency-aware) cache and conversation cache implementations.
 """
 
-from .lru_cache import LRUCache
+from .lru_cache import FrequencyAwareLRUCache, LRUCache
 from .conversation_cache import ConversationCache
 
 __all__ = [
     "LRUCache",
+    "FrequencyAwareLRUCache",
     "ConversationCache",
 ]
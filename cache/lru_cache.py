@@ -14,10 +14,11 @@
     >>> value = await cache.get("key")
 """
 
+import itertools
 import threading
 import time
 from collections import OrderedDict
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.common.logger import get_logger
 
@@ -56,6 +57,10 @@ class LRUCache:
         # 统一使用递归锁（支持同一线程重入）
         self._lock = threading.RLock()
 
+    def _evict(self) -> None:
+        """淘汰一项（调用方需持有锁），默认淘汰最久未使用的项"""
+        self.cache.popitem(last=False)
+
     def _is_expired(self, expire_time: float) -> bool:
         """检查缓存项是否过期
 
@@ -78,17 +83,7 @@ class LRUCache:
 
         性能：使用被动过期机制，访问时检查过期
         """
-        with self._lock:
-            if key in self.cache:
-                value, expire_time = self.cache[key]
-                # 被动过期检查
-                if self._is_expired(expire_time):
-                    del self.cache[key]
-                    return None
-                # 移到末尾（标记为最近使用）
-                self.cache.move_to_end(key)
-                return value
-            return None
+        return self.get_sync(key)
 
     def get_sync(self, key: Any) -> Optional[Any]:
         """Get cached value (sync, thread-safe).
@@ -99,19 +94,20 @@ class LRUCache:
         Returns:
             Cached value or None if not found/expired
 
-        性能：使用被动过期机制，访问时检查过期
+        性能：使用被动过期机制，访问时检查过期；命中路径只做一次字典查找
         """
         with self._lock:
-            if key in self.cache:
-                value, expire_time = self.cache[key]
-                # 被动过期检查
-                if self._is_expired(expire_time):
-                    del self.cache[key]
-                    return None
-                # 移到末尾（标记为最近使用）
-                self.cache.move_to_end(key)
-                return value
-            return None
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            value, expire_time = entry
+            # 被动过期检查
+            if self._is_expired(expire_time):
+                del self.cache[key]
+                return None
+            # 移到末尾（标记为最近使用）
+            self.cache.move_to_end(key)
+            return value
 
     async def set(self, key: Any, value: Any) -> None:
         """Set cached value (async, thread-safe).
@@ -122,17 +118,7 @@ class LRUCache:
 
         性能：自动淘汰最少使用的项（LRU）
         """
-        with self._lock:
-            # 计算过期时间
-            expire_time = time.time() + self.ttl
-
-            if key in self.cache:
-                self.cache.move_to_end(key)
-            # 存储 (value, expire_time) 元组
-            self.cache[key] = (value, expire_time)
-            # LRU淘汰
-            if len(self.cache) > self.max_size:
-                self.cache.popitem(last=False)
+        self.set_sync(key, value)
 
     def set_sync(self, key: Any, value: Any) -> None:
         """Set cached value (sync, thread-safe).
@@ -147,13 +133,12 @@ class LRUCache:
             # 计算过期时间
             expire_time = time.time() + self.ttl
 
-            if key in self.cache:
-                self.cache.move_to_end(key)
-            # 存储 (value, expire_time) 元组
+            # 存储 (value, expire_time) 元组，并移到末尾（已存在的键赋值不会改变位置）
             self.cache[key] = (value, expire_time)
-            # LRU淘汰
+            self.cache.move_to_end(key)
+            # 容量淘汰
             if len(self.cache) > self.max_size:
-                self.cache.popitem(last=False)
+                self._evict()
 
     def clear(self) -> None:
         """Clear all cached items."""
@@ -184,8 +169,7 @@ class LRUCache:
             key: Cache key to delete
         """
         with self._lock:
-            if key in self.cache:
-                del self.cache[key]
+            self.cache.pop(key, None)
 
     def __contains__(self, key: Any) -> bool:
         """Check if key exists in cache (and not expired).
@@ -197,14 +181,14 @@ class LRUCache:
             True if key exists and not expired, False otherwise
         """
         with self._lock:
-            if key in self.cache:
-                value, expire_time = self.cache[key]
-                # 被动过期检查
-                if self._is_expired(expire_time):
-                    del self.cache[key]
-                    return False
-                return True
-            return False
+            entry = self.cache.get(key)
+            if entry is None:
+                return False
+            # 被动过期检查
+            if self._is_expired(entry[1]):
+                del self.cache[key]
+                return False
+            return True
 
     def __getitem__(self, key: Any) -> Any:
         """Get cached value without moving to end (but checks expiry).
@@ -219,9 +203,10 @@ class LRUCache:
             KeyError: If key not found or expired
         """
         with self._lock:
-            if key not in self.cache:
+            entry = self.cache.get(key)
+            if entry is None:
                 raise KeyError(key)
-            value, expire_time = self.cache[key]
+            value, expire_time = entry
             # 被动过期检查
             if self._is_expired(expire_time):
                 del self.cache[key]
@@ -236,3 +221,88 @@ class LRUCache:
             value: Value to cache
         """
         self.set_sync(key, value)
+
+
+class FrequencyAwareLRUCache(LRUCache):
+    """兼顾剩余TTL与命中次数的LRU缓存（v-LRU风格淘汰）
+
+    访问高度倾斜时（少数聊天贡献大部分请求），纯LRU会被一次性访问的键
+    冲掉热点项。本类在淘汰时只考察最久未使用的一小段候选，按
+    ``剩余TTL / ttl + 命中次数 / 候选中最大命中次数`` 打分（两项都归一化到
+    0-1，权重相当）并淘汰得分最低者，其余行为（TTL被动过期、接口）与LRUCache一致。
+
+    参数：
+        max_size: 缓存的最大项数（默认：100）
+        ttl: 缓存项的生存时间（秒，默认：300）
+        sample_ratio: 淘汰候选占缓存的比例（按最近使用顺序取最旧部分，默认：0.1）
+
+    使用示例：
+        >>> cache = FrequencyAwareLRUCache(max_size=100, ttl=300)
+        >>> cache["chat_1"] = "schedule"
+        >>> cache["chat_1"]
+        'schedule'
+    """
+
+    # 候选数下限，保证小容量缓存淘汰时仍有选择余地
+    _MIN_SAMPLE_SIZE = 4
+
+    def __init__(self, max_size: int = 100, ttl: int = 300, sample_ratio: float = 0.1):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.sample_ratio = sample_ratio
+        # 各键的命中次数（键被重新写入或移除时重置）
+        self._hits: Dict[Any, int] = {}
+
+    def _record_hit(self, key: Any) -> None:
+        """记录一次命中（调用方需持有锁）"""
+        self._hits[key] = self._hits.get(key, 0) + 1
+
+    def _evict(self) -> None:
+        """在最久未使用的候选中淘汰得分最低的一项（调用方需持有锁）"""
+        sample_size = max(self._MIN_SAMPLE_SIZE, int(len(self.cache) * self.sample_ratio))
+        candidates = [
+            (key, expire_time, self._hits.get(key, 0))
+            for key, (_, expire_time) in itertools.islice(self.cache.items(), sample_size)
+        ]
+        now = time.time()
+        ttl = self.ttl or 1
+        max_hits = max(hits for _, _, hits in candidates) or 1
+        victim = min(
+            candidates,
+            key=lambda candidate: max(candidate[1] - now, 0.0) / ttl + candidate[2] / max_hits,
+        )[0]
+
+        del self.cache[victim]
+        self._hits.pop(victim, None)
+
+        # 过期删除不经过本类，定期清理已不在缓存中的计数，防止无界增长
+        if len(self._hits) > 2 * self.max_size:
+            self._hits = {key: hits for key, hits in self._hits.items() if key in self.cache}
+
+    def get_sync(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            value = super().get_sync(key)
+            if value is not None:
+                self._record_hit(key)
+            return value
+
+    def set_sync(self, key: Any, value: Any) -> None:
+        with self._lock:
+            if key not in self.cache:
+                self._hits.pop(key, None)
+            super().set_sync(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._hits.clear()
+
+    def __delitem__(self, key: Any) -> None:
+        with self._lock:
+            super().__delitem__(key)
+            self._hits.pop(key, None)
+
+    def __getitem__(self, key: Any) -> Any:
+        with self._lock:
+            value = super().__getitem__(key)
+            self._record_hit(key)
+            return value
@@ -2,7 +2,7 @@
 
 import json
 from typing import Dict, Any, List, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from src.plugin_system import BaseCommand
 from src.common.logger import get_logger
@@ -264,7 +264,6 @@ class PlanningCommand(BaseCommand):
                 days_to_keep = int(parts[2])
 
             # 计算截止日期
-            from datetime import timedelta
             cutoff_date = self.tz_manager.get_now() - timedelta(days=days_to_keep)
             today_str = self.tz_manager.get_now().strftime("%Y-%m-%d")
 
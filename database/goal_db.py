@@ -21,17 +21,46 @@
 import sqlite3
 import json
 import threading
-from contextlib import contextmanager
-from datetime import datetime
+from contextlib import closing, contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时回退到标准库 json
+    orjson = None
+
 from src.common.logger import get_logger
 from ..utils.timezone_manager import TimezoneManager
 
 logger = get_logger("autonomous_planning.database")
 
 
+def _std_json_dumps(value: Any) -> str:
+    """Serialize a JSON column value with the standard library.
+
+    Uses the same compact, non-ASCII-escaping layout as orjson, so a column
+    written with or without orjson installed has identical text.
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+if orjson is not None:
+    def _json_dumps(value: Any) -> str:
+        """Serialize a JSON column value (orjson, stored as TEXT for json_extract).
+
+        Non-str keys are converted to strings like json.dumps does; note that
+        orjson writes NaN/Infinity as null where json.dumps writes NaN.
+        """
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    _json_loads = orjson.loads
+else:
+    _json_dumps = _std_json_dumps
+    _json_loads = json.loads
+
+
 class GoalDatabase:
     """SQLite目标数据库管理器
 
@@ -61,6 +90,15 @@ class GoalDatabase:
     # Database schema version for migrations
     SCHEMA_VERSION = 1
 
+    _INSERT_GOAL_SQL = """
+        INSERT INTO goals (
+            goal_id, name, description, goal_type, priority,
+            creator_id, chat_id, status, created_at, deadline,
+            interval_seconds, conditions, parameters, progress,
+            last_executed_at, execution_count, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
     def __init__(self, db_path: str = "data/goals.db", backup_on_init: bool = True, timezone: str = "Asia/Shanghai"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -129,11 +167,17 @@ class GoalDatabase:
             raise
 
     def _create_backup(self) -> None:
-        """Create backup of existing database."""
-        import shutil
+        """Create backup of existing database.
+
+        Uses SQLite's online backup API rather than copying the file, so the
+        backup includes changes still held in the WAL and is a consistent
+        snapshot without any extra file locking.
+        """
         backup_path = self.db_path.with_suffix('.db.bak')
         try:
-            shutil.copy2(self.db_path, backup_path)
+            with closing(sqlite3.connect(str(self.db_path))) as source, \
+                    closing(sqlite3.connect(str(backup_path))) as target:
+                source.backup(target)
             logger.debug(f"Created database backup: {backup_path}")
         except Exception as e:
             logger.error(f"Failed to create database backup: {e}")
@@ -207,6 +251,50 @@ class GoalDatabase:
 
         logger.debug("Database schema initialized")
 
+    def _goal_row(
+        self,
+        goal_id: str,
+        name: str,
+        description: str,
+        goal_type: str,
+        priority: str,
+        creator_id: str,
+        chat_id: str,
+        status: str = "active",
+        created_at: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
+        conditions: Optional[Dict[str, Any]] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        progress: int = 0,
+        last_executed_at: Optional[datetime] = None,
+        execution_count: int = 0,
+        **kwargs,  # 忽略旧字段如 interval_seconds
+    ) -> Tuple[Any, ...]:
+        """Build the parameter tuple for _INSERT_GOAL_SQL."""
+        now = self.tz_manager.get_now()
+        if created_at is None:
+            created_at = now
+
+        return (
+            goal_id,
+            name,
+            description,
+            goal_type,
+            priority,
+            creator_id,
+            chat_id,
+            status,
+            created_at.isoformat(),
+            deadline.isoformat() if deadline else None,
+            None,  # interval_seconds 已弃用，始终为 NULL
+            _json_dumps(conditions) if conditions else None,
+            _json_dumps(parameters) if parameters else None,
+            progress,
+            last_executed_at.isoformat() if last_executed_at else None,
+            execution_count,
+            now.isoformat()
+        )
+
     def create_goal(
         self,
         goal_id: str,
@@ -251,40 +339,47 @@ class GoalDatabase:
         Raises:
             sqlite3.IntegrityError: If goal_id already exists
         """
-        if created_at is None:
-            created_at = self.tz_manager.get_now()
+        row = self._goal_row(
+            goal_id, name, description, goal_type, priority, creator_id, chat_id,
+            status=status,
+            created_at=created_at,
+            deadline=deadline,
+            conditions=conditions,
+            parameters=parameters,
+            progress=progress,
+            last_executed_at=last_executed_at,
+            execution_count=execution_count,
+        )
 
         with self._transaction() as conn:
-            conn.execute("""
-                INSERT INTO goals (
-                    goal_id, name, description, goal_type, priority,
-                    creator_id, chat_id, status, created_at, deadline,
-                    interval_seconds, conditions, parameters, progress,
-                    last_executed_at, execution_count, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                goal_id,
-                name,
-                description,
-                goal_type,
-                priority,
-                creator_id,
-                chat_id,
-                status,
-                created_at.isoformat(),
-                deadline.isoformat() if deadline else None,
-                None,  # interval_seconds 已弃用，始终为 NULL
-                json.dumps(conditions) if conditions else None,
-                json.dumps(parameters) if parameters else None,
-                progress,
-                last_executed_at.isoformat() if last_executed_at else None,
-                execution_count,
-                self.tz_manager.get_now().isoformat()
-            ))
+            conn.execute(self._INSERT_GOAL_SQL, row)
 
         logger.debug(f"Created goal: {goal_id}")
         return goal_id
 
+    def create_goals(self, goals: List[Dict[str, Any]]) -> List[str]:
+        """Create several goals in a single transaction.
+
+        The whole batch is committed (and synced to disk) once instead of
+        once per goal; if any insert fails, none of the goals are created.
+
+        Args:
+            goals: List of keyword-argument dicts accepted by create_goal
+
+        Returns:
+            goal_ids of created goals, in input order
+
+        Raises:
+            sqlite3.IntegrityError: If any goal_id already exists
+        """
+        rows = [self._goal_row(**goal) for goal in goals]
+
+        with self._transaction() as conn:
+            conn.executemany(self._INSERT_GOAL_SQL, rows)
+
+        logger.debug(f"Created {len(rows)} goals in one transaction")
+        return [row[0] for row in rows]
+
     def get_goal(self, goal_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a goal by ID.
 
@@ -309,7 +404,9 @@ class GoalDatabase:
         chat_id: Optional[str] = None,
         status: Optional[str] = None,
         limit: Optional[int] = None,
-        offset: int = 0
+        offset: int = 0,
+        has_time_window: bool = False,
+        created_date: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get all goals with optional filtering.
 
@@ -318,6 +415,8 @@ class GoalDatabase:
             status: Filter by status
             limit: Maximum number of goals to return
             offset: Number of goals to skip
+            has_time_window: Only return schedule goals (time_window in parameters or conditions)
+            created_date: Only return goals created on this date (YYYY-MM-DD)
 
         Returns:
             List of goal dictionaries
@@ -336,6 +435,16 @@ class GoalDatabase:
             query += " AND status = ?"
             params.append(status)
 
+        if created_date:
+            # 日期范围比较可利用 created_at 索引（ISO字符串按字典序有序）
+            next_date = (date.fromisoformat(created_date) + timedelta(days=1)).isoformat()
+            query += " AND created_at >= ? AND created_at < ?"
+            params.extend([created_date, next_date])
+
+        if has_time_window:
+            query += """ AND (json_type(parameters, '$.time_window') IS NOT NULL
+                         OR json_type(conditions, '$.time_window') IS NOT NULL)"""
+
         query += " ORDER BY created_at DESC"
 
         if limit:
@@ -409,7 +518,7 @@ class GoalDatabase:
         for key, value in kwargs.items():
             if key in ['conditions', 'parameters'] and value is not None:
                 set_clauses.append(f"{key} = ?")
-                params.append(json.dumps(value))
+                params.append(_json_dumps(value))
             elif key in ['created_at', 'deadline', 'last_executed_at'] and value is not None:
                 set_clauses.append(f"{key} = ?")
                 params.append(value.isoformat() if isinstance(value, datetime) else value)
@@ -467,8 +576,24 @@ class GoalDatabase:
         Returns:
             Number of goals deleted
         """
-        query = "DELETE FROM goals WHERE status = ?"
-        params = [status]
+        return self.delete_goals_by_statuses([status], older_than=older_than)
+
+    def delete_goals_by_statuses(self, statuses: List[str], older_than: Optional[datetime] = None) -> int:
+        """Delete goals in any of several statuses with a single statement.
+
+        Args:
+            statuses: Goal statuses to delete
+            older_than: Only delete goals created before this date
+
+        Returns:
+            Number of goals deleted
+        """
+        if not statuses:
+            return 0
+
+        placeholders = ", ".join("?" for _ in statuses)
+        query = f"DELETE FROM goals WHERE status IN ({placeholders})"
+        params = list(statuses)
 
         if older_than:
             query += " AND created_at < ?"
@@ -479,10 +604,57 @@ class GoalDatabase:
             deleted_count = cursor.rowcount
 
         if deleted_count > 0:
-            logger.info(f"Deleted {deleted_count} goals with status={status}")
+            logger.info(f"Deleted {deleted_count} goals with status in {statuses}")
 
         return deleted_count
 
+    def cleanup_goals(
+        self,
+        expire_before_date: str,
+        delete_statuses: List[str],
+        delete_older_than: datetime,
+        expired_status: str = "completed",
+    ) -> Tuple[int, int]:
+        """在单个事务中完成过期日程标记和旧目标删除
+
+        1. 将创建日期早于 expire_before_date 的 active 日程（带time_window）标记为 expired_status
+        2. 删除 delete_statuses 状态中创建时间早于 delete_older_than 的目标
+
+        Args:
+            expire_before_date: 日期字符串（YYYY-MM-DD），早于该日期的日程视为过期
+            delete_statuses: 需要清理的状态列表（如 completed/cancelled）
+            delete_older_than: 只删除此时间之前创建的目标
+            expired_status: 过期日程标记的状态（默认：completed）
+
+        Returns:
+            (标记为过期的日程数, 删除的目标数)
+        """
+        placeholders = ", ".join("?" for _ in delete_statuses)
+
+        with self._transaction() as conn:
+            # json_type 对存在但值为null的键也返回非NULL，与Python侧 "time_window" in dict 一致
+            cursor = conn.execute("""
+                UPDATE goals SET status = ?, updated_at = ?
+                WHERE status = 'active'
+                AND substr(created_at, 1, 10) < ?
+                AND (json_type(parameters, '$.time_window') IS NOT NULL
+                     OR json_type(conditions, '$.time_window') IS NOT NULL)
+            """, (expired_status, self.tz_manager.get_now().isoformat(), expire_before_date))
+            expired_count = cursor.rowcount
+
+            deleted_count = 0
+            if delete_statuses:
+                cursor = conn.execute(f"""
+                    DELETE FROM goals
+                    WHERE status IN ({placeholders}) AND created_at < ?
+                """, (*delete_statuses, delete_older_than.isoformat()))
+                deleted_count = cursor.rowcount
+
+        if expired_count or deleted_count:
+            logger.info(f"Cleanup: expired {expired_count} schedules, deleted {deleted_count} old goals")
+
+        return expired_count, deleted_count
+
     def count_goals(self, chat_id: Optional[str] = None, status: Optional[str] = None) -> int:
         """Count goals with optional filtering.
 
@@ -522,9 +694,9 @@ class GoalDatabase:
 
         # Parse JSON fields
         if data.get('conditions'):
-            data['conditions'] = json.loads(data['conditions'])
+            data['conditions'] = _json_loads(data['conditions'])
         if data.get('parameters'):
-            data['parameters'] = json.loads(data['parameters'])
+            data['parameters'] = _json_loads(data['parameters'])
 
         # Parse datetime fields (keep as ISO strings for compatibility)
         # The GoalManager will convert them back to datetime objects
@@ -4,6 +4,7 @@
 遵循DRY原则,减少样板代码,提高可维护性。
 """
 
+import asyncio
 import functools
 from typing import Any, Callable, Optional, Tuple
 from src.common.logger import get_logger
@@ -85,7 +86,6 @@ def handle_exception(
                 return default_return
 
         # 根据函数类型返回对应的wrapper
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -1,22 +1,99 @@
 """自主规划插件 - 事件处理器模块"""
 
 import asyncio
+import bisect
+import functools
+import itertools
+import logging
+import threading
 import time
-from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, FrozenSet, Mapping, NamedTuple, Sequence, Tuple
+from datetime import date, datetime, timezone
 
 from src.plugin_system import BaseEventHandler, EventType, MaiMessages, CustomEventHandlerResult
 from src.common.logger import get_logger
 
 from ..planner.goal_manager import get_goal_manager
 from ..planner.schedule_generator import ScheduleGenerator
-from ..cache import LRUCache
-from ..utils.time_utils import parse_time_window
+from ..cache import FrequencyAwareLRUCache
+from ..utils.keyword_matcher import CategoryMatcher
+from ..utils.log_utils import is_log_enabled
+from ..utils.time_utils import format_minutes_to_time, get_raw_time_window, parse_time_window
 from ..utils.timezone_manager import TimezoneManager
 from .exception_handler import handle_exception, handle_exception_silent
 
 logger = get_logger("autonomous_planning.handlers")
 
+
+class _ScheduleEntry(NamedTuple):
+    """日程区间索引条目（时间均为从00:00起的分钟数，跨夜窗口 end > 1440）"""
+
+    start: int
+    end: int
+    time_str: str
+    name: str
+    description: Optional[str]
+    goal_type: Optional[str]
+    is_today: bool
+    created_at_ts: float
+
+
+class _DayIndex(NamedTuple):
+    """当天的日程区间索引（条目按开始时间排序）
+
+    查询热路径只读取并行的数值数组（按位置对齐），完整条目仅在选出当前活动后访问一次。
+    构建后不可变：重建时整体替换引用，读取方无需加锁。
+    """
+
+    starts: Tuple[int, ...]                       # 各条目的开始时间，供 bisect 使用
+    ends: Tuple[int, ...]                         # 各条目的结束时间（跨夜窗口 > 1440）
+    is_today: Tuple[bool, ...]                    # 各条目是否今天创建
+    created_ts: Tuple[float, ...]                 # 各条目的创建时间戳
+    today_max_ends: Tuple[int, ...]               # 前缀内今天创建的条目的最大结束时间（无则为0）
+    overnight_positions: Tuple[int, ...]          # 今天创建的跨夜条目（end > 1440）的位置
+    entries: Tuple[_ScheduleEntry, ...]
+    activity_items: Tuple[Tuple[str, str], ...]       # 各条目的 (时间, 活动名)
+
+
+class _FutureView(Sequence):
+    """当天索引中某位置之后的 (时间, 活动名) 的只读视图
+
+    不复制底层元组：传统模式只取第一项，模板引擎只迭代前几项。
+    """
+
+    __slots__ = ("_items", "_offset")
+
+    def __init__(self, items: Tuple[Tuple[str, str], ...], offset: int):
+        self._items = items
+        self._offset = offset
+
+    def __len__(self) -> int:
+        return max(len(self._items) - self._offset, 0)
+
+    def __bool__(self) -> bool:
+        return self._offset < len(self._items)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return self._items[self._offset:][position]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("future activity index out of range")
+        return self._items[self._offset + position]
+
+    def __iter__(self):
+        return itertools.islice(self._items, self._offset, None)
+
+
+# 1970-01-01 的日期序号，用于由时间戳推算日期
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 系统启动信号：ON_START事件到达时置位（一次性），缓存预热等待该信号而非固定延时
+_system_started = asyncio.Event()
+
 class AutonomousPlannerEventHandler(BaseEventHandler):
     """自主规划事件处理器 - 定期清理过期目标"""
 
@@ -31,6 +108,7 @@ class AutonomousPlannerEventHandler(BaseEventHandler):
         self.goal_manager = get_goal_manager()
         self.check_task: Optional[asyncio.Task] = None
         self.is_running = False
+        self._stop_event = asyncio.Event()  # 停止信号，用于立即唤醒等待中的清理循环
         self.enabled = self.get_config("plugin.enabled", True)
         self.cleanup_interval = self.get_config("autonomous_planning.cleanup_interval", 3600)  # 每小时清理一次
         logger.debug(f"自主规划维护任务初始化完成 (清理间隔: {self.cleanup_interval}秒)")
@@ -39,11 +117,14 @@ class AutonomousPlannerEventHandler(BaseEventHandler):
         self, message: MaiMessages | None
     ) -> Tuple[bool, bool, Optional[str], Optional[CustomEventHandlerResult], Optional[MaiMessages]]:
         """处理启动事件，启动后台清理循环"""
+        _system_started.set()
+
         if not self.enabled:
             return True, True, None, None, None
 
         if not self.is_running:
             self.is_running = True
+            self._stop_event.clear()
             self.check_task = asyncio.create_task(self._cleanup_loop())
             logger.info("目标清理循环已启动")
 
@@ -59,11 +140,11 @@ class AutonomousPlannerEventHandler(BaseEventHandler):
             except Exception as e:
                 logger.error(f"清理目标异常: {e}", exc_info=True)
 
-            # 等待下一个清理周期（使用短间隔检查，支持快速退出）
-            for _ in range(int(self.cleanup_interval)):
-                if not self.is_running:
-                    break
-                await asyncio.sleep(1)
+            # 等待下一个清理周期（收到停止信号时立即退出）
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.cleanup_interval)
+            except asyncio.TimeoutError:
+                pass
 
         logger.info("🛑 目标清理循环已停止")
 
@@ -76,6 +157,7 @@ class AutonomousPlannerEventHandler(BaseEventHandler):
         if self.is_running:
             logger.debug("正在停止目标清理循环...")
             self.is_running = False
+            self._stop_event.set()
 
             # 等待任务结束（最多3秒）
             if self.check_task:
@@ -91,15 +173,15 @@ class AutonomousPlannerEventHandler(BaseEventHandler):
 
     @handle_exception("清理旧目标失败: {e}", log_level="error", exc_info=True)
     async def _cleanup_old_goals(self):
-        """清理旧目标和过期日程"""
-        # 1. 清理过期的日程（昨天及更早的ACTIVE日程）
-        expired_schedules = self.goal_manager.cleanup_expired_schedules()
+        """清理旧目标和过期日程（单次事务完成）"""
+        cleanup_days = self.get_config("autonomous_planning.cleanup_old_goals_days", 30)
+        expired_schedules, cleaned_count = self.goal_manager.cleanup_once(days=cleanup_days)
+
+        # 1. 过期的日程（昨天及更早的ACTIVE日程）已标记为完成
         if expired_schedules > 0:
             logger.info(f"🧹 清理了 {expired_schedules} 个过期日程（昨天及更早）")
 
-        # 2. 清理已完成/已取消的旧目标（保留30天）
-        cleanup_days = self.get_config("autonomous_planning.cleanup_old_goals_days", 30)
-        cleaned_count = self.goal_manager.cleanup_old_goals(days=cleanup_days)
+        # 2. 已完成/已取消的旧目标（默认保留30天）已删除
         if cleaned_count > 0:
             logger.info(f"🧹 清理了 {cleaned_count} 个旧目标（{cleanup_days}天前）")
 
@@ -126,8 +208,121 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         "做什么", "干什么", "要做",
     }
 
-    # P1优化：预编译正则表达式，一次匹配所有关键词
-    _TIME_KEYWORDS_PATTERN = __import__('re').compile('|'.join(TIME_KEYWORDS))
+    # P1优化：所有消息类型关键词合并为一个带类别标签的匹配器，导入时构建一次，单次扫描完成分类
+    # （Aho-Corasick，未安装时回退到按长度排序的正则）
+    _MESSAGE_CATEGORY_MATCHER = CategoryMatcher({
+        # 时间相关（传统关键词匹配模式）
+        "time": TIME_KEYWORDS,
+        # 直接询问当前状态
+        "direct_query": {
+            "在干嘛", "做什么", "忙吗", "在做", "正在",
+            "日程", "计划", "安排", "行程",
+            "现在", "当前", "这会儿",
+        },
+        # 询问未来计划
+        "future_query": {
+            "接下来", "等下", "稍后", "之后", "待会",
+            "明天", "今晚", "晚上", "下午", "上午",
+        },
+        # 问候语
+        "greeting": {
+            "早上好", "晚上好", "早安", "晚安",
+            "你好", "hi", "hello", "嗨",
+        },
+        # 技术问题
+        "tech": {
+            "怎么", "如何", "为什么", "什么是",
+            "报错", "错误", "bug", "异常",
+            "代码", "配置", "安装", "调试",
+        },
+        # Smart模式轻量级预判：技术场景直接跳过注入
+        "smart_skip_tech": {
+            "怎么", "如何", "报错", "错误", "bug", "代码", "配置",
+        },
+    })
+
+    # 缓存预热等待系统启动信号的最长时间（秒）
+    _PREHEAT_READY_TIMEOUT = 30.0
+
+    # 无日程时的查询结果（不可变，所有调用共享）
+    _EMPTY_SCHEDULE = (None, None, (), None)
+
+    # 日程缓存的时间分桶长度（秒）
+    _SCHEDULE_BUCKET_SECONDS = 15 * 60
+
+    # 时区UTC偏移量的缓存时间（秒）
+    _TZ_OFFSET_REFRESH = 60.0
+
+    # 日程区间索引的有效期（秒），兜底处理绕过GoalManager的数据库修改
+    _DAY_INDEX_TTL = 60.0
+
+    # 用户消息提取：回退字段（按优先级）、聊天记录标记、回退字段最大长度
+    _FALLBACK_MESSAGE_ATTRS = ("raw_message", "plain_text")
+    _CHAT_HISTORY_MARKER = "群里正在进行的聊天内容"
+    _MAX_FALLBACK_MESSAGE_LENGTH = 200
+
+    # Smart注入prompt的固定片段（与消息无关，类加载时构建一次）
+    _SMART_PROMPT_HEADER = "【可选上下文 - Bot的当前日程】"
+    _SMART_PROMPT_FOOTER = "\n\n---\n"
+    _SMART_GUIDANCE = {
+        "command": "⚠️ 用户正在执行命令，请忽略以上日程信息，专注处理命令。",
+        "tech": "⚠️ 用户在询问技术问题，请忽略以上日程信息，专注回答技术内容。",
+        "direct_query": "💡 用户直接询问当前状态，请如实告知当前活动及状态。",
+        "future_query": "💡 用户询问未来计划，请自然地介绍后续安排。",
+        "greeting": "💡 用户在问候，可以自然地顺便提一下今天的计划（可选，不要强行提及）。",
+        "default": "\n".join([
+            "💡 以上是Bot当前的日程信息，仅供参考。",
+            "   - 如果与用户问题相关，可以自然提及",
+            "   - 如果不相关，请完全忽略此信息",
+            "   - 不要为了提及日程而刻意转移话题",
+        ]),
+    }
+
+    def _build_schedule_config(self) -> Mapping[str, Any]:
+        """读取日程生成配置，构建只读快照（初始化时读取一次，供每次生成复用）"""
+        return MappingProxyType({
+            "use_multi_round": self.get_config("autonomous_planning.schedule.use_multi_round", False),
+            "max_rounds": self.get_config("autonomous_planning.schedule.max_rounds", 1),
+            "quality_threshold": self.get_config("autonomous_planning.schedule.quality_threshold", 0.85),
+            "min_activities": self.get_config("autonomous_planning.schedule.min_activities", 8),
+            "max_activities": self.get_config("autonomous_planning.schedule.max_activities", 15),
+            "enable_detailed_description": self.get_config("autonomous_planning.schedule.enable_detailed_description", True),
+            "min_description_length": self.get_config("autonomous_planning.schedule.min_description_length", 20),
+            "max_description_length": self.get_config("autonomous_planning.schedule.max_description_length", 50),
+            "max_tokens": self.get_config("autonomous_planning.schedule.max_tokens", 8192),
+            "custom_prompt": self.get_config("autonomous_planning.schedule.custom_prompt", ""),
+            "custom_model": MappingProxyType({
+                "enabled": self.get_config("autonomous_planning.schedule.custom_model.enabled", False),
+                "model_name": self.get_config("autonomous_planning.schedule.custom_model.model_name", ""),
+                "api_base": self.get_config("autonomous_planning.schedule.custom_model.api_base", ""),
+                "api_key": self.get_config("autonomous_planning.schedule.custom_model.api_key", ""),
+                "provider": self.get_config("autonomous_planning.schedule.custom_model.provider", "openai"),
+                "temperature": self.get_config("autonomous_planning.schedule.custom_model.temperature", 0.7),
+            }),
+        })
+
+    # 跨实例共享的组件 {组件类: 实例}（不持有会话状态，内部缓存线程安全）
+    _shared_components: Dict[type, Any] = {}
+    _shared_components_lock = threading.Lock()
+
+    @classmethod
+    def _get_shared_component(cls, component_cls: type) -> Any:
+        """获取（首次调用时创建）跨实例共享的组件实例"""
+        with cls._shared_components_lock:
+            component = cls._shared_components.get(component_cls)
+            if component is None:
+                component = cls._shared_components[component_cls] = component_cls()
+            return component
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _classify_message(msg_lower: str) -> FrozenSet[str]:
+        """对（已转小写的）用户消息做关键词分类，返回命中的类别集合
+
+        同一条消息在一次注入流程中会被多处判断，且闲聊消息重复率高，
+        因此按消息文本做有界LRU缓存。
+        """
+        return ScheduleInjectEventHandler._MESSAGE_CATEGORY_MATCHER.classify(msg_lower)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -137,19 +332,40 @@ class ScheduleInjectEventHandler(BaseEventHandler):
 
         # 读取详细描述配置
         self.enable_detailed_description = self.get_config("autonomous_planning.schedule.enable_detailed_description", True)
+        # Smart注入时最多显示的未来活动数量（初始化时读取一次）
+        self._max_future_activities = self.get_config(
+            "autonomous_planning.schedule.inject.max_future_activities", 3
+        )
+
+        # 日程生成配置快照（避免每次生成都逐项读取配置）
+        self._schedule_config = self._build_schedule_config()
+        # 日程生成器（首次生成时创建，之后复用；配置快照不变，无需重建）
+        self._schedule_generator: Optional[ScheduleGenerator] = None
 
         # P2优化：从配置读取缓存参数
         cache_max_size = self.get_config("autonomous_planning.schedule.cache_max_size", 100)
-        self._schedule_cache = LRUCache(max_size=cache_max_size)
-
-        # 缓存配置
         self._schedule_cache_ttl = self.get_config("autonomous_planning.schedule.cache_ttl", 300)
-        self._cache_cleanup_interval = 600  # 10分钟清理一次
-        self._last_cache_cleanup = 0  # 上次清理时间
+        # 聊天活跃度高度倾斜，淘汰时兼顾命中次数，避免一次性聊天冲掉热点聊天的缓存
+        self._schedule_cache = FrequencyAwareLRUCache(max_size=cache_max_size, ttl=self._schedule_cache_ttl)
+
+        # 配置时区的UTC偏移量缓存：(过期时间戳, 偏移秒数)
+        self._tz_offset_state: Tuple[float, int] = (0.0, 0)
+        # 今天日期字符串缓存 (日期序号, "YYYY-MM-DD")，跨天后才重新格式化
+        self._today_str_state: Tuple[int, str] = (-1, "")
+        # 当天日程区间索引 {来源聊天ID: (构建时间, 是否有目标, 索引)}（LRU，最近使用的在末尾）
+        # 全局日程只建一份索引，由所有聊天共用；只有没有全局日程时才按聊天建索引
+        self._day_index: OrderedDict[str, Tuple[float, bool, _DayIndex]] = OrderedDict()
+        self._day_index_max_size = cache_max_size
+        # 索引所属的 (日期, 目标数据版本)：跨天或目标增删改后旧索引全部作废，整体清空
+        self._day_index_generation: Tuple[str, int] = ("", -1)
 
         # 日程生成锁（防止并发生成）
         self._generate_lock = asyncio.Lock()
         self._last_schedule_check_date = None
+        # 进行中的日程生成任务：并发消息共同等待同一个任务，而不是排队等锁
+        self._generation_task: Optional[asyncio.Task] = None
+        # 缓存预热任务（完成后置为None）
+        self._preheat_task: Optional[asyncio.Task] = None
 
         # 🆕 智能注入组件初始化
         try:
@@ -189,8 +405,9 @@ class ScheduleInjectEventHandler(BaseEventHandler):
             self.inject_mode = inject_mode
 
             # 初始化智能组件
-            self.intent_classifier = IntentClassifier() if enable_intent_classification else None
-            self.state_analyzer = ActivityStateAnalyzer() if enable_state_analysis else None
+            # 意图分类器和状态分析器不持有会话状态（分类器只有线程安全的结果缓存），所有实例共享一份（避免重复构建关键词库）
+            self.intent_classifier = self._get_shared_component(IntentClassifier) if enable_intent_classification else None
+            self.state_analyzer = self._get_shared_component(ActivityStateAnalyzer) if enable_state_analysis else None
             self.content_engine = ContentTemplateEngine(
                 self.state_analyzer
             ) if enable_state_analysis else None
@@ -234,29 +451,86 @@ class ScheduleInjectEventHandler(BaseEventHandler):
             logger.debug(f"日程注入功能已启用（缓存TTL: {self._schedule_cache_ttl}秒，最大{cache_max_size}项）")
             if self.auto_generate_schedule:
                 logger.debug("日程自动生成功能已启用")
-            asyncio.create_task(self._preheat_cache())  # 启动缓存预热
+            # 启动缓存预热：持有任务引用防止运行中被垃圾回收，完成后释放
+            self._preheat_task = asyncio.create_task(self._preheat_cache())
+            self._preheat_task.add_done_callback(self._clear_preheat_task)
+
+    def _clear_preheat_task(self, task: asyncio.Task) -> None:
+        """预热任务完成回调：释放任务引用"""
+        if self._preheat_task is task:
+            self._preheat_task = None
+
+    def _get_local_day_minute(self) -> Tuple[int, int]:
+        """
+        获取配置时区下的 (日期序号, 当天分钟数)
+
+        UTC偏移量缓存 _TZ_OFFSET_REFRESH 秒，期间直接由 time.time() 推算本地时间，
+        避免每次调用都构造带时区的datetime对象。
+
+        Returns:
+            (date.toordinal() 形式的日期序号, 从00:00起的分钟数)
+        """
+        epoch = time.time()
+        expire, offset = self._tz_offset_state
+        if epoch >= expire:
+            # 偏移量 = 本地墙上时间 - UTC墙上时间（按分钟取整，兼容无时区信息的回退时间）
+            local_now = self._get_timezone_now().replace(tzinfo=None)
+            utc_now = datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+            offset = round((local_now - utc_now).total_seconds() / 60) * 60
+            # 过期时间与偏移量放在同一元组中整体替换，并发读取不会拿到不匹配的一对
+            self._tz_offset_state = (epoch + self._TZ_OFFSET_REFRESH, offset)
+
+        days, seconds = divmod(int(epoch) + offset, 86400)
+        return _EPOCH_ORDINAL + days, seconds // 60
+
+    def _format_day(self, day_ordinal: int) -> str:
+        """
+        将日期序号格式化为 YYYY-MM-DD（同一天内复用上次的结果）
+
+        Args:
+            day_ordinal: date.toordinal() 形式的日期序号
+
+        Returns:
+            日期字符串
+        """
+        cached_ordinal, today_str = self._today_str_state
+        if cached_ordinal != day_ordinal:
+            today_str = date.fromordinal(day_ordinal).isoformat()
+            self._today_str_state = (day_ordinal, today_str)
+        return today_str
+
+    def _get_today_str(self) -> str:
+        """获取配置时区下今天的日期字符串（YYYY-MM-DD）"""
+        return self._format_day(self._get_local_day_minute()[0])
 
     def _get_timezone_now(self):
         """
         获取配置时区的当前时间
 
-        根据插件配置中的时区设置，返回对应时区的当前时间。
-        如果pytz模块未安装或时区配置错误，则回退到系统时间。
+        时区对象在 __init__ 中由 TimezoneManager 解析一次并缓存，
+        解析失败时回退到系统时间。
 
         Returns:
             datetime.datetime: 当前时间对象
         """
-        timezone_str = self.get_config("autonomous_planning.schedule.timezone", "Asia/Shanghai")
-        # 使用 TimezoneManager 统一处理时区
         return self.tz_manager.get_now()
 
     @handle_exception_silent("缓存预热失败: {e}", log_level="warning")
     async def _preheat_cache(self):
-        """预热缓存 - 启动时提前加载全局日程"""
-        await asyncio.sleep(5)  # 等待系统初始化
+        """预热缓存 - 系统启动后提前加载全局及各聊天的今日日程"""
+        # 等待ON_START启动信号；未收到（如事件已错过或被禁用）时超时后直接预热
+        try:
+            await asyncio.wait_for(_system_started.wait(), timeout=self._PREHEAT_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.debug("未收到系统启动信号，直接开始预热")
+
         logger.debug("🔥 开始预热日程缓存...")
-        self._get_current_schedule("global")
-        logger.debug("✅ 日程缓存预热完成")
+        today_str = self._get_today_str()
+        schedule_goals = get_goal_manager().get_active_goals(has_time_window=True, created_date=today_str)
+        chat_ids = {"global"} | {goal.chat_id for goal in schedule_goals}
+        for chat_id in chat_ids:
+            self._get_current_schedule(chat_id)
+        logger.debug(f"✅ 日程缓存预热完成（{len(chat_ids)}个聊天）")
 
     @handle_exception("检查今天日程失败: {e}", log_level="warning", default_return=False)
     def _check_today_schedule_exists(self, chat_id: str = "global") -> bool:
@@ -269,39 +543,13 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         Returns:
             True表示今天已有日程，False表示没有
         """
-        goal_manager = get_goal_manager()
-        goals = goal_manager.get_active_goals(chat_id=chat_id)
-
-        if not goals:
-            return False
-
         # ✅ 获取配置的时区并计算今天的日期字符串
-        today_str = self._get_timezone_now().strftime("%Y-%m-%d")
+        today_str = self._get_today_str()
 
-        # 检查是否有今天创建的带time_window的目标
-        for goal in goals:
-            # 检查是否有time_window（日程类型的标志）
-            has_time_window = False
-            if goal.parameters and "time_window" in goal.parameters:
-                has_time_window = True
-            elif goal.conditions and "time_window" in goal.conditions:
-                has_time_window = True
-
-            if has_time_window:
-                # 检查创建时间是否是今天
-                goal_date = None
-                if goal.created_at:
-                    try:
-                        if isinstance(goal.created_at, str):
-                            goal_date = goal.created_at.split("T")[0]
-                        else:
-                            goal_date = goal.created_at.strftime("%Y-%m-%d")
-                    except Exception as e:
-                        logger.debug(f"解析目标创建时间失败: {goal.created_at} - {e}")
-
-                if goal_date == today_str:
-                    logger.debug(f"找到今天的日程目标: {goal.name}")
-                    return True
+        # 只判断是否存在今天创建的、带time_window的活跃目标（按目标数据版本缓存）
+        if get_goal_manager().has_schedule_for_date(today_str, chat_id=chat_id):
+            logger.debug(f"找到今天的日程目标: chat_id={chat_id}")
+            return True
 
         logger.debug("今天还没有日程")
         return False
@@ -311,7 +559,8 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         """
         自动生成今天的日程
 
-        注意：此方法假设调用者已持有 _generate_lock，不会再次获取锁
+        注意：调用者需先在 _generate_lock 内认领今天的生成任务（更新检查日期并登记任务），
+        本方法在锁外执行，不会获取锁
 
         Args:
             user_id: 用户ID
@@ -322,30 +571,9 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         """
         logger.info("🔄 开始自动生成今天的日程...")
 
-        goal_manager = get_goal_manager()
-
-        # 读取配置并传给ScheduleGenerator
-        schedule_config = {
-            "use_multi_round": self.get_config("autonomous_planning.schedule.use_multi_round", False),
-            "max_rounds": self.get_config("autonomous_planning.schedule.max_rounds", 1),
-            "quality_threshold": self.get_config("autonomous_planning.schedule.quality_threshold", 0.85),
-            "min_activities": self.get_config("autonomous_planning.schedule.min_activities", 8),
-            "max_activities": self.get_config("autonomous_planning.schedule.max_activities", 15),
-            "enable_detailed_description": self.get_config("autonomous_planning.schedule.enable_detailed_description", True),
-            "min_description_length": self.get_config("autonomous_planning.schedule.min_description_length", 20),
-            "max_description_length": self.get_config("autonomous_planning.schedule.max_description_length", 50),
-            "max_tokens": self.get_config("autonomous_planning.schedule.max_tokens", 8192),
-            "custom_prompt": self.get_config("autonomous_planning.schedule.custom_prompt", ""),
-            "custom_model": {
-                "enabled": self.get_config("autonomous_planning.schedule.custom_model.enabled", False),
-                "model_name": self.get_config("autonomous_planning.schedule.custom_model.model_name", ""),
-                "api_base": self.get_config("autonomous_planning.schedule.custom_model.api_base", ""),
-                "api_key": self.get_config("autonomous_planning.schedule.custom_model.api_key", ""),
-                "provider": self.get_config("autonomous_planning.schedule.custom_model.provider", "openai"),
-                "temperature": self.get_config("autonomous_planning.schedule.custom_model.temperature", 0.7),
-            },
-        }
-        schedule_generator = ScheduleGenerator(goal_manager, config=schedule_config)
+        if self._schedule_generator is None:
+            self._schedule_generator = ScheduleGenerator(get_goal_manager(), config=self._schedule_config)
+        schedule_generator = self._schedule_generator
 
         # 生成每日日程
         schedule = await schedule_generator.generate_daily_schedule(
@@ -368,10 +596,9 @@ class ScheduleInjectEventHandler(BaseEventHandler):
 
         if created_ids:
             logger.info(f"✅ 自动生成日程成功，创建了 {len(created_ids)} 个目标")
-            # 清理缓存，强制重新加载
-            self._schedule_cache.clear()
+            # 新建目标会更新目标数据版本号，日程缓存自动失效
             # 🔧 修复：统一使用时区感知时间
-            self._last_schedule_check_date = self._get_timezone_now().strftime("%Y-%m-%d")
+            self._last_schedule_check_date = self._get_today_str()
             return True
         else:
             logger.warning("⚠️ 日程生成失败，没有创建任何目标")
@@ -421,10 +648,9 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         # 向后兼容：使用传统关键词匹配
         logger.debug("智能组件未加载，使用传统关键词匹配")
 
-        # P1优化：使用预编译正则一次匹配所有关键词
-        match = self._TIME_KEYWORDS_PATTERN.search(user_message)
-        if match:
-            logger.info(f"检测到时间关键词: {match.group()}，将注入日程")
+        # P1优化：单次扫描匹配所有关键词（结果按消息缓存）
+        if "time" in self._classify_message(user_message.lower()):
+            logger.info("检测到时间关键词，将注入日程")
             return True
 
         # 规则2：短消息 + 问号（可能是询问）
@@ -445,41 +671,44 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         Returns:
             用户消息文本，如果提取失败则返回空字符串
         """
-        user_message = ""
-
-        # 🔧 优先级1: 从message_base_info提取原始消息
-        if hasattr(message, 'message_base_info') and message.message_base_info:
+        # 🔧 优先级1: 从message_base_info提取原始消息（getattr一次完成存在性检查和取值）
+        base_info = getattr(message, 'message_base_info', None)
+        if base_info:
             # 尝试多个可能的字段
             user_message = (
-                message.message_base_info.get('message') or
-                message.message_base_info.get('original_message') or
-                message.message_base_info.get('content') or
-                ""
+                base_info.get('message') or
+                base_info.get('original_message') or
+                base_info.get('content')
             )
             if user_message:
-                logger.debug(f"从message_base_info提取到用户消息: '{str(user_message)[:50]}...'")
-                return str(user_message)
-
-        # 🔧 优先级2: 从raw_message提取（可能更原始）
-        if hasattr(message, 'raw_message') and message.raw_message:
-            # raw_message可能更接近原始消息
-            raw = str(message.raw_message)
-            # 如果raw_message不包含聊天记录标记，则使用它
-            if '群里正在进行的聊天内容' not in raw and len(raw) < 200:
-                logger.debug(f"从raw_message提取到用户消息: '{raw[:50]}...'")
-                return raw
-
-        # 🔧 优先级3: 从plain_text提取（但可能包含聊天记录）
-        if hasattr(message, 'plain_text') and message.plain_text:
-            plain = str(message.plain_text)
-            # 如果plain_text很短且不包含聊天记录，则使用
-            if '群里正在进行的聊天内容' not in plain and len(plain) < 200:
-                logger.debug(f"从plain_text提取到用户消息: '{plain[:50]}...'")
-                return plain
+                if not isinstance(user_message, str):
+                    user_message = str(user_message)
+                if is_log_enabled(logger, logging.DEBUG):
+                    logger.debug(f"从message_base_info提取到用户消息: '{user_message[:50]}...'")
+                return user_message
+
+        # 🔧 优先级2: raw_message（可能更接近原始消息）
+        # 🔧 优先级3: plain_text（但可能包含聊天记录）
+        for attr_name in self._FALLBACK_MESSAGE_ATTRS:
+            value = getattr(message, attr_name, None)
+            if not value:
+                continue
+            text = value if isinstance(value, str) else str(value)
+            # 先做O(1)的长度检查，只对短文本扫描聊天记录标记
+            if len(text) < self._MAX_FALLBACK_MESSAGE_LENGTH and self._CHAT_HISTORY_MARKER not in text:
+                if is_log_enabled(logger, logging.DEBUG):
+                    logger.debug(f"从{attr_name}提取到用户消息: '{text[:50]}...'")
+                return text
 
         logger.warning("未能提取到有效的用户消息")
         return ""
 
+    def _is_tech_or_command(self, user_message: str) -> bool:
+        """判断消息是否为技术问答或命令（Smart模式下这类消息不注入日程）"""
+        if user_message.startswith('/') or user_message.startswith('sudo'):
+            return True
+        return "smart_skip_tech" in self._classify_message(user_message.lower())
+
     def _get_user_id(self, message: MaiMessages) -> str:
         """获取用户ID
 
@@ -489,15 +718,17 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         Returns:
             用户ID，如果获取失败则返回'unknown'
         """
-        if hasattr(message, 'message_base_info') and message.message_base_info:
-            return str(message.message_base_info.get('user_id', 'unknown'))
-        return 'unknown'
+        base_info = getattr(message, 'message_base_info', None)
+        if not base_info:
+            return 'unknown'
+        user_id = base_info.get('user_id', 'unknown')
+        return user_id if isinstance(user_id, str) else str(user_id)
 
     def _build_smart_inject_prompt(
         self,
         current_activity: str,
         description: str,
-        future_activities: List[Tuple[str, str]],
+        future_activities: Sequence[Tuple[str, str]],
         user_message: str,
         activity_type: Optional[str] = None
     ) -> str:
@@ -518,82 +749,42 @@ class ScheduleInjectEventHandler(BaseEventHandler):
         Returns:
             注入的prompt内容
         """
-        # 分析用户消息类型（轻量级预判，辅助LLM）
-        msg_lower = user_message.lower()
-
-        # 直接询问当前状态
-        is_direct_query = any(kw in msg_lower for kw in [
-            "在干嘛", "做什么", "忙吗", "在做", "正在",
-            "日程", "计划", "安排", "行程",
-            "现在", "当前", "这会儿"
-        ])
-
-        # 询问未来计划
-        is_future_query = any(kw in msg_lower for kw in [
-            "接下来", "等下", "稍后", "之后", "待会",
-            "明天", "今晚", "晚上", "下午", "上午"
-        ])
-
-        # 问候语
-        is_greeting = any(kw in msg_lower for kw in [
-            "早上好", "晚上好", "早安", "晚安",
-            "你好", "hi", "hello", "嗨"
-        ])
-
-        # 技术问题
-        is_tech_question = any(kw in msg_lower for kw in [
-            "怎么", "如何", "为什么", "什么是",
-            "报错", "错误", "bug", "异常",
-            "代码", "配置", "安装", "调试"
-        ])
-
-        # 命令执行
-        is_command = user_message.startswith('/') or user_message.startswith('sudo')
-
-        # 构建prompt
-        prompt_parts = []
+        # 分析用户消息类型（轻量级预判，辅助LLM），一次扫描得到所有类别
+        flags = self._classify_message(user_message.lower())
+
+        # 使用指导类型（优先级：命令 > 技术问题 > 询问当前 > 询问未来 > 问候 > 默认）
+        if user_message.startswith('/') or user_message.startswith('sudo'):
+            guidance = self._SMART_GUIDANCE["command"]
+        elif "tech" in flags:
+            guidance = self._SMART_GUIDANCE["tech"]
+        elif "direct_query" in flags:
+            guidance = self._SMART_GUIDANCE["direct_query"]
+        elif "future_query" in flags:
+            guidance = self._SMART_GUIDANCE["future_query"]
+        elif "greeting" in flags:
+            guidance = self._SMART_GUIDANCE["greeting"]
+        else:
+            guidance = self._SMART_GUIDANCE["default"]
 
-        # 1. 日程信息部分
-        prompt_parts.append("【可选上下文 - Bot的当前日程】")
-        # 根据配置决定是否显示详细描述
+        # 1. 日程信息部分（根据配置决定是否显示详细描述）
         if self.enable_detailed_description and description:
-            prompt_parts.append(f"现在：{current_activity}（{description}）")
+            prompt_parts = [self._SMART_PROMPT_HEADER, f"现在：{current_activity}（{description}）"]
         else:
-            prompt_parts.append(f"现在：{current_activity}")
+            prompt_parts = [self._SMART_PROMPT_HEADER, f"现在：{current_activity}"]
 
         # 未来活动
         if future_activities:
-            max_show = self.get_config(
-                "autonomous_planning.schedule.inject.max_future_activities", 3
-            )
             prompt_parts.append("接下来的安排:")
-            for i, (time_str, activity_name) in enumerate(future_activities[:max_show]):
-                prompt_parts.append(f"  {time_str} - {activity_name}")
-
-        prompt_parts.append("")  # 空行
-
-        # 2. 使用指导部分（根据消息类型）
-        if is_command:
-            prompt_parts.append("⚠️ 用户正在执行命令，请忽略以上日程信息，专注处理命令。")
-        elif is_tech_question:
-            prompt_parts.append("⚠️ 用户在询问技术问题，请忽略以上日程信息，专注回答技术内容。")
-        elif is_direct_query:
-            prompt_parts.append("💡 用户直接询问当前状态，请如实告知当前活动及状态。")
-        elif is_future_query:
-            prompt_parts.append("💡 用户询问未来计划，请自然地介绍后续安排。")
-        elif is_greeting:
-            prompt_parts.append("💡 用户在问候，可以自然地顺便提一下今天的计划（可选，不要强行提及）。")
-        else:
-            prompt_parts.append("💡 以上是Bot当前的日程信息，仅供参考。")
-            prompt_parts.append("   - 如果与用户问题相关，可以自然提及")
-            prompt_parts.append("   - 如果不相关，请完全忽略此信息")
-            prompt_parts.append("   - 不要为了提及日程而刻意转移话题")
+            prompt_parts.extend(
+                f"  {time_str} - {activity_name}"
+                for time_str, activity_name in itertools.islice(future_activities, self._max_future_activities)
+            )
 
-        prompt_parts.append("")  # 空行
-        prompt_parts.append("---")  # 分隔符
+        # 2. 使用指导部分（空行分隔，末尾附分隔符）
         prompt_parts.append("")
+        prompt_parts.append(guidance)
 
-        return "\n".join(prompt_parts)
+        return "\n".join(prompt_parts) + self._SMART_PROMPT_FOOTER
 
     async def execute(
         self, message: MaiMessages | None
@@ -626,6 +817,20 @@ class ScheduleInjectEventHandler(BaseEventHandler):
             user_message = self._extract_user_message(message)
             user_id = self._get_user_id(message)
 
+            # Smart模式轻量级预判：技术问答/命令一定不注入，
+            # 直接返回，跳过日程生成检查、日程查询和上下文判断
+            if self.inject_mode == "smart" and self._is_tech_or_command(user_message):
+                logger.debug("Smart模式：检测到技术/命令场景，跳过注入")
+                if self.context_cache:
+                    self.context_cache.add_turn(
+                        user_id=user_id,
+                        user_message=user_message,
+                        intent="tech_or_command",
+                        injected=False,
+                        activity=self.context_cache.get_last_activity(user_id)
+                    )
+                return True, True, None, None, None
+
             # 🆕 检查对话上下文：判断是否在连续讨论日程话题
             context_continue_inject = False
             context_reason = None
@@ -634,60 +839,67 @@ class ScheduleInjectEventHandler(BaseEventHandler):
                     user_id, None  # 当前活动稍后获取
                 )
 
-            # P0修复：检查今天是否有日程，没有则自动生成（原子化操作）
+            # P0修复：检查今天是否有日程，没有则自动生成
             if self.auto_generate_schedule:
-                # 🔧 修复：统一使用 _get_timezone_now() 处理时区
-                today_str = self._get_timezone_now().strftime("%Y-%m-%d")
+                # 🔧 修复：统一按配置时区计算今天日期
+                today_str = self._get_today_str()
 
-                # 使用锁确保检查+生成的原子性，防止竞态条件
+                # 锁只保护"检查+认领"：更新检查日期并创建生成任务，
+                # 生成过程在锁外等待，避免其他消息被阻塞长达 generation_timeout 秒；
+                # 生成期间到达的消息等待同一个任务，而不是再次生成或拿到空日程
+                owns_generation = False
                 async with self._generate_lock:
                     # 只在今天还没检查过的情况下检查
                     if self._last_schedule_check_date != today_str:
-                        has_schedule = self._check_today_schedule_exists(chat_id="global")
-
-                        if not has_schedule:
+                        if self._check_today_schedule_exists(chat_id="global"):
+                            logger.debug("今天已有日程，跳过自动生成")
+                        else:
                             logger.info("📅 今天还没有日程，准备自动生成...")
+                            # 复用上面已提取的用户ID，未知用户时以system身份生成
+                            owner_id = user_id if user_id != 'unknown' else "system"
+                            # 🆕 创建任务以便超时时主动取消
+                            self._generation_task = asyncio.create_task(
+                                self._auto_generate_today_schedule(owner_id, chat_id="global")
+                            )
+                            owns_generation = True
 
-                            # 获取用户ID
-                            user_id = "system"
-                            if hasattr(message, 'message_base_info') and message.message_base_info:
-                                user_id = message.message_base_info.get('user_id', 'system')
+                        # 更新检查日期（无论是否生成成功），其他并发消息不会重复生成
+                        self._last_schedule_check_date = today_str
+                    generation_task = self._generation_task
 
-                            # P0修复：添加超时保护（可配置，默认3分钟）
-                            generation_timeout = self.get_config("autonomous_planning.schedule.generation_timeout", 180.0)
-                            generation_task = None
+                if generation_task is not None and not generation_task.done():
+                    # P0修复：添加超时保护（可配置，默认3分钟）
+                    generation_timeout = self.get_config("autonomous_planning.schedule.generation_timeout", 180.0)
+                    try:
+                        # shield：某个等待方超时不会连带取消共享的生成任务
+                        generation_success = await asyncio.wait_for(
+                            asyncio.shield(generation_task),
+                            timeout=generation_timeout
+                        )
+                    except asyncio.TimeoutError:
+                        # 🆕 P0级：由发起方在超时后主动取消任务，避免后台继续运行
+                        if owns_generation:
+                            logger.error(f"⏰ 日程生成超时（{generation_timeout}秒），跳过本次生成")
+                            generation_task.cancel()
                             try:
-                                # 🆕 创建任务以便超时时主动取消
-                                generation_task = asyncio.create_task(
-                                    self._auto_generate_today_schedule(user_id, chat_id="global")
-                                )
-                                generation_success = await asyncio.wait_for(
-                                    generation_task,
-                                    timeout=generation_timeout
-                                )
-                            except asyncio.TimeoutError:
-                                logger.error(f"⏰ 日程生成超时（{generation_timeout}秒），跳过本次生成")
-                                # 🆕 P0级：超时后主动取消任务，避免后台继续运行
-                                if generation_task and not generation_task.done():
-                                    generation_task.cancel()
-                                    try:
-                                        await generation_task
-                                    except asyncio.CancelledError:
-                                        logger.debug("已取消超时的日程生成任务")
-                                generation_success = False
-                            except Exception as e:
-                                logger.error(f"日程生成异常: {e}", exc_info=True)
-                                generation_success = False
-
-                            if generation_success:
-                                logger.info("✅ 日程自动生成完成，继续注入")
-                            else:
-                                logger.warning("⚠️ 日程自动生成失败")
-                        else:
-                            logger.debug("今天已有日程，跳过自动生成")
+                                await generation_task
+                            except asyncio.CancelledError:
+                                logger.debug("已取消超时的日程生成任务")
+                        generation_success = False
+                    except asyncio.CancelledError:
+                        # 生成任务被发起方取消时，其他等待方照常继续；自身被取消则向上传递
+                        if not generation_task.cancelled():
+                            raise
+                        generation_success = False
+                    except Exception as e:
+                        logger.error(f"日程生成异常: {e}", exc_info=True)
+                        generation_success = False
 
-                        # 更新检查日期（无论是否生成成功）
-                        self._last_schedule_check_date = today_str
+                    if owns_generation:
+                        if generation_success:
+                            logger.info("✅ 日程自动生成完成，继续注入")
+                        else:
+                            logger.warning("⚠️ 日程自动生成失败")
 
             # 获取当前日程（现在返回所有未来活动列表）
             current_activity, current_description, all_future_activities, activity_type = self._get_current_schedule(chat_id)
@@ -725,36 +937,23 @@ class ScheduleInjectEventHandler(BaseEventHandler):
                 # 2. 准确率更高（LLM理解力强）
                 # 3. 简化状态分析（LLM自己判断）
 
-                # 轻量级预判：技术问答/命令直接跳过
-                msg_lower = user_message.lower()
-                is_command = user_message.startswith('/') or user_message.startswith('sudo')
-                is_tech = any(kw in msg_lower for kw in ["怎么", "如何", "报错", "错误", "bug", "代码", "配置"])
+                # 技术问答/命令已在前面预判并返回
 
-                if is_command or is_tech:
-                    # 技术/命令场景，不注入
-                    logger.debug(f"Smart模式：检测到技术/命令场景，跳过注入")
-                    if self.context_cache:
-                        self.context_cache.add_turn(
-                            user_id=user_id,
-                            user_message=user_message,
-                            intent="tech_or_command",
-                            injected=False,
-                            activity=current_activity
-                        )
-                else:
-                    # 🆕 对话上下文增强：连续对话中强制注入
-                    if context_continue_inject:
+                # 🆕 对话上下文增强：连续对话中强制注入
+                if context_continue_inject:
+                    if is_log_enabled(logger, logging.INFO):
                         logger.info(f"📖 对话上下文触发注入: {context_reason}")
 
-                    # 使用smart模式prompt
-                    inject_content = self._build_smart_inject_prompt(
-                        current_activity=current_activity,
-                        description=current_description,
-                        future_activities=all_future_activities,
-                        user_message=user_message,
-                        activity_type=activity_type
-                    )
-                    injected = True
+                # 使用smart模式prompt
+                inject_content = self._build_smart_inject_prompt(
+                    current_activity=current_activity,
+                    description=current_description,
+                    future_activities=all_future_activities,
+                    user_message=user_message,
+                    activity_type=activity_type
+                )
+                injected = True
+                if is_log_enabled(logger, logging.INFO):
                     logger.info(f"✅ Smart注入: {current_activity}")
 
             elif self.inject_mode == "rule" and self.intent_classifier and self.inject_optimizer:
@@ -766,7 +965,8 @@ class ScheduleInjectEventHandler(BaseEventHandler):
 
                 # 🆕 对话上下文增强
                 if context_continue_inject:
-                    logger.info(f"📖 对话上下文触发注入: {context_reason}")
+                    if is_log_enabled(logger, logging.INFO):
+                        logger.info(f"📖 对话上下文触发注入: {context_reason}")
                     should_inject = True
                     skip_reason = None
                 else:
@@ -776,7 +976,8 @@ class ScheduleInjectEventHandler(BaseEventHandler):
                     )
 
                 if not should_inject:
-                    logger.debug(f"Rule模式：InjectOptimizer决定跳过注入: {skip_reason}")
+                    if is_log_enabled(logger, logging.DEBUG):
+                        logger.debug(f"Rule模式：InjectOptimizer决定跳过注入: {skip_reason}")
                     if self.context_cache:
                         self.context_cache.add_turn(
                             user_id=user_id,
@@ -804,26 +1005,29 @@ class ScheduleInjectEventHandler(BaseEventHandler):
                             self.inject_optimizer.record_injection(
                                 user_id, current_activity, inject_content or "", intent
                             )
-                        logger.info(
-                            f"✅ Rule注入: intent={intent.value}, "
-                            f"confidence={confidence:.2f}"
-                        )
+                        if is_log_enabled(logger, logging.INFO):
+                            logger.info(
+                                f"✅ Rule注入: intent={intent.value}, "
+                                f"confidence={confidence:.2f}"
+                            )
 
             else:
                 # ============================================================
                 # 传统模式（向后兼容）
                 # ============================================================
-                inject_content = f"【当前状态】\n这会儿正{current_activity}"
+                inject_parts = [f"【当前状态】\n这会儿正{current_activity}"]
                 # 根据配置决定是否显示详细描述
                 if self.enable_detailed_description and current_description:
-                    inject_content += f"（{current_description}）"
-                inject_content += f"\n回复时可以自然提到当前在做什么，不要刻意强调。"
+                    inject_parts.append(f"（{current_description}）")
+                inject_parts.append("\n回复时可以自然提到当前在做什么，不要刻意强调。")
                 if all_future_activities:
                     next_time, next_activity = all_future_activities[0]
-                    inject_content += f"\n等下{next_time}要{next_activity}。"
-                inject_content += "\n"
+                    inject_parts.append(f"\n等下{next_time}要{next_activity}。")
+                inject_parts.append("\n")
+                inject_content = "".join(inject_parts)
                 injected = True
-                logger.info(f"✅ Traditional注入: {current_activity}")
+                if is_log_enabled(logger, logging.INFO):
+                    logger.info(f"✅ Traditional注入: {current_activity}")
 
             # 🆕 记录到对话上下文缓存
             if self.context_cache:
@@ -847,190 +1051,231 @@ class ScheduleInjectEventHandler(BaseEventHandler):
             logger.error(f"注入日程信息失败: {e}", exc_info=True)
             return True, True, None, None, None
 
-    def _cleanup_expired_cache(self, current_time: float):
-        """清理过期的缓存项（P0修复：线程安全）"""
-        # 使用锁保护，防止与并发的get/set操作冲突
-        with self._schedule_cache._lock:
-            expired_keys = []
-
-            # 使用list()创建快照避免迭代时修改
-            for key, (_, cached_time) in list(self._schedule_cache.cache.items()):
-                if current_time - cached_time > self._schedule_cache_ttl:
-                    expired_keys.append(key)
-
-            for key in expired_keys:
-                if key in self._schedule_cache.cache:
-                    del self._schedule_cache.cache[key]
-
-            if expired_keys:
-                logger.debug(f"清理了 {len(expired_keys)} 个过期缓存项")
-
-    def _get_current_schedule(self, chat_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str], List[Tuple[str, str]], Optional[str]]:
+    def _get_current_schedule(self, chat_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str], Sequence[Tuple[str, str]], Optional[str]]:
         """
         获取当前日程信息（带优化缓存）
 
         优化：
         1. 缓存TTL从30秒提升到5分钟
         2. 缓存键改为按小时（而非5分钟窗口），提高命中率
-        3. 定期清理过期缓存，避免内存泄漏
+        3. 过期由缓存自身按TTL被动处理，容量由max_size限定
 
         Returns:
             (当前活动, 活动描述, 所有未来活动列表, 当前活动类型)
-            其中未来活动列表格式: [(时间, 活动名), ...]
+            其中未来活动为按时间排序的不可变序列: ((时间, 活动名), ...)
         """
-        import time
-
-        # 获取当前时间
-        # 🔧 修复：统一使用时区感知时间
-        now = self._get_timezone_now()
-        current_hour = now.hour
-        current_minute = now.minute
-        current_time = time.time()
-
         # P1修复：按15分钟窗口缓存（而非按小时），提高精度同时保持命中率
         # 原因：同一小时内活动可能变化，但15分钟内基本稳定
-        time_window = (current_hour * 60 + current_minute) // 15
-        cache_key = f"{chat_id or 'global'}_{now.strftime('%Y%m%d')}_{time_window}"
-
-        # 定期清理过期缓存（避免内存无限增长）
-        if current_time - self._last_cache_cleanup > self._cache_cleanup_interval:
-            self._cleanup_expired_cache(current_time)
-            self._last_cache_cleanup = current_time
-
-        # 检查缓存是否有效
-        if cache_key in self._schedule_cache:
-            cached_result, cached_time = self._schedule_cache[cache_key]
-            if current_time - cached_time < self._schedule_cache_ttl:
-                # 缓存命中
-                return cached_result
-
-        # 缓存过期或不存在，重新查询
+        # 快速路径：缓存键只用时间戳分桶 (聊天ID, 15分钟桶, 目标数据版本)，命中时不做任何时区计算。
+        # 各时区的UTC偏移都是15分钟的整数倍，因此时间戳分桶与本地15分钟窗口对齐；
+        # 目标增删改后版本号变化，旧缓存项自然不再命中，无需显式失效
+        data_version = get_goal_manager().version
+        cache_key = (chat_id or "global", int(time.time()) // self._SCHEDULE_BUCKET_SECONDS, data_version)
+
+        # 检查缓存（过期项在访问时被动删除）
+        cached_result = self._schedule_cache.get_sync(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+        # 缓存过期或不存在，基于当天的区间索引查询
         try:
-            goal_manager = get_goal_manager()
-
-            # 先尝试获取全局日程（chat_id="global"）
-            goals = goal_manager.get_active_goals(chat_id="global")
-
-            # 如果没有全局日程，再尝试获取当前聊天的日程
-            if not goals and chat_id:
-                goals = goal_manager.get_active_goals(chat_id=chat_id)
-
-            if not goals:
-                result = (None, None, [], None)
-                self._schedule_cache[cache_key] = (result, current_time)
-                return result
-
-            current_time_minutes = current_hour * 60 + current_minute
-            today_date = now.strftime("%Y-%m-%d")
-
-            # 找到有时间窗口的目标，优先选择今天创建的
-            scheduled_goals = []
-            for goal in goals:
-                # 向后兼容：优先从parameters读取time_window，其次从conditions读取
-                time_window = None
-                if goal.parameters and "time_window" in goal.parameters:
-                    time_window = goal.parameters.get("time_window")
-                elif goal.conditions:
-                    time_window = goal.conditions.get("time_window")
-
-                if time_window:
-                    # 检查是否是今天创建的任务
-                    # created_at 可能是 datetime 对象或字符串
-                    is_today = False
-                    if goal.created_at:
-                        if isinstance(goal.created_at, str):
-                            is_today = goal.created_at.startswith(today_date)
-                        else:
-                            # datetime 对象
-                            is_today = goal.created_at.strftime("%Y-%m-%d") == today_date
-                    scheduled_goals.append((goal, time_window, is_today))
-
-            if not scheduled_goals:
-                result = (None, None, [], None)
-                self._schedule_cache[cache_key] = (result, current_time)
-                return result
-
-            # 排序：按开始时间（兼容新旧格式）
-            def get_start_minutes(item):
-                goal, time_window, is_today = item
-                if not time_window or len(time_window) < 2:
-                    return 0
-                start_val = time_window[0]
-                # 判断格式：end_val > 24 说明是分钟格式
-                if time_window[1] > 24:
-                    return start_val
-                else:
-                    return start_val * 60
+            # 获取当前时间（配置时区的日期序号和当天分钟数，不构造datetime）
+            day_ordinal, current_time_minutes = self._get_local_day_minute()
+            today_date = self._format_day(day_ordinal)
+            index = self._get_day_index(chat_id, today_date, data_version, current_time_minutes)
 
-            scheduled_goals.sort(key=get_start_minutes)
+            if not index.entries:
+                self._schedule_cache[cache_key] = self._EMPTY_SCHEDULE
+                return self._EMPTY_SCHEDULE
+
+            # 开始时间 <= 当前时间的条目位于 split 之前，之后的均为未来活动
+            split = bisect.bisect_right(index.starts, current_time_minutes)
 
             # 查找当前活动（仅选择今天创建的任务）
-            current_activity = None
-            current_description = None
-            current_activity_type = None  # 🆕 新增：活动类型
-            current_goal_created_at = None
-
-            for goal, time_window, is_today in scheduled_goals:
-                start_minutes, end_minutes = parse_time_window(time_window)
-                if start_minutes is None:
-                    continue
-
-                # 处理跨夜时间窗口（end_minutes > 1440）
-                # 例如 23:00-01:00 会被转换为 [1380, 1500]
-                is_in_window = False
-                if end_minutes > 1440:
-                    # 跨夜任务：检查当前时间是否在开始时间之后，或在（结束时间-1440）之前
-                    # 例如：1380 <= 1410 < 1500 或 0 <= 30 < 60
-                    is_in_window = (start_minutes <= current_time_minutes < 1440) or (0 <= current_time_minutes < (end_minutes - 1440))
-                else:
-                    # 普通任务
-                    is_in_window = start_minutes <= current_time_minutes < end_minutes
-
-                if is_in_window:
-                    # 仅选择今天创建的任务
-                    if is_today:
-                        # 如果有多个今天的任务，选择创建时间最新的
-                        if current_activity is None or (goal.created_at and goal.created_at > current_goal_created_at):
-                            current_activity = goal.name
-                            current_description = goal.description
-                            current_activity_type = goal.goal_type  # 🆕 获取真实活动类型
-                            current_goal_created_at = goal.created_at
-
-            # 🆕 收集所有未来活动（优先选择今天的任务）
-            all_future_activities = []
-            for goal, time_window, is_today in scheduled_goals:
-                start_val = time_window[0] if len(time_window) > 0 else 0
-                end_val = time_window[1] if len(time_window) > 1 else start_val + 60
-
-                # 判断格式并转换
-                if end_val <= 24:
-                    start_minutes = start_val * 60
-                else:
-                    start_minutes = start_val
-
-                if start_minutes > current_time_minutes:
-                    # 转换为时:分格式
-                    hour = start_minutes // 60
-                    minute = start_minutes % 60
-                    time_str = f"{hour:02d}:{minute:02d}"
-
-                    # 添加到列表（今天的任务排在前面）
-                    if is_today:
-                        all_future_activities.append((time_str, goal.name))
-                    else:
-                        # 非今天的任务添加到末尾
-                        all_future_activities.append((time_str, goal.name))
-
-            result = (current_activity, current_description, all_future_activities, current_activity_type)
-            self._schedule_cache[cache_key] = (result, current_time)
+            # 窗口是否覆盖当前时间：视为从 start 起、长度为 end - start 的区间，按1440分钟取模，
+            # 统一处理跨夜窗口，例如 23:00-01:00 即 [1380, 1500]，00:30 时 (30 - 1380) % 1440 = 90 < 120
+            starts, ends, is_today = index.starts, index.ends, index.is_today
+            today_max_ends = index.today_max_ends
+            candidates = []
+            # 从 split 向前回溯已开始的条目，前缀最大结束时间 <= 当前时间后更早的条目都已结束，停止回溯
+            position = split - 1
+            while position >= 0 and today_max_ends[position] > current_time_minutes:
+                start = starts[position]
+                if is_today[position] and (current_time_minutes - start) % 1440 < ends[position] - start:
+                    candidates.append(position)
+                position -= 1
+
+            # 跨夜条目在次日凌晨的部分（已开始的跨夜条目可能重复加入，不影响取最大值）
+            candidates.extend(
+                position for position in index.overnight_positions
+                if (current_time_minutes - starts[position]) % 1440 < ends[position] - starts[position]
+            )
+
+            # 如果有多个今天的任务，选择创建时间最新的（相同时取开始时间靠前的）
+            created_ts = index.created_ts
+            best = max(
+                candidates,
+                key=lambda position: (created_ts[position], -position),
+                default=None,
+            )
+            current_entry = None if best is None else index.entries[best]
+
+            # 🆕 所有未来活动：预先构建好的 (时间, 活动名) 元组上的视图（已按开始时间排序），按需读取
+            all_future_activities = _FutureView(index.activity_items, split)
+
+            if current_entry is None:
+                result = (None, None, all_future_activities, None)
+            else:
+                result = (current_entry.name, current_entry.description, all_future_activities, current_entry.goal_type)
+            self._schedule_cache[cache_key] = result
             return result
 
         except Exception as e:
             logger.debug(f"获取日程信息失败: {e}")
-            result = (None, None, [], None)
-            self._schedule_cache[cache_key] = (result, current_time)
-            return result
+            self._schedule_cache[cache_key] = self._EMPTY_SCHEDULE
+            return self._EMPTY_SCHEDULE
+
+    def _get_day_index(
+        self, chat_id: Optional[str], today_date: str, data_version: int, current_time_minutes: int
+    ) -> _DayIndex:
+        """
+        获取当天的日程区间索引（跨天、目标数据变化或短TTL到期后重建）
+
+        Args:
+            chat_id: 聊天ID
+            today_date: 今天日期（YYYY-MM-DD）
+            data_version: 目标数据版本号
+            current_time_minutes: 当前分钟数，重建时作为剔除已结束条目的截止时间
+
+        Returns:
+            当天的日程区间索引
+        """
+        generation = (today_date, data_version)
+        if generation != self._day_index_generation:
+            # 跨天或目标数据变化：旧索引（包括已不活跃聊天的）全部释放
+            self._day_index.clear()
+            self._day_index_generation = generation
+
+        # 优先使用全局日程；没有全局日程时才使用当前聊天自己的日程
+        has_goals, index = self._get_source_index("global", today_date, current_time_minutes)
+        if has_goals or not chat_id or chat_id == "global":
+            return index
+        return self._get_source_index(chat_id, today_date, current_time_minutes)[1]
+
+    def _get_source_index(
+        self, source_chat_id: str, today_date: str, current_time_minutes: int
+    ) -> Tuple[bool, _DayIndex]:
+        """
+        获取某个日程来源（"global" 或聊天ID）的区间索引，必要时重建
+
+        Returns:
+            (该来源是否有活跃目标, 区间索引)
+        """
+        now_monotonic = time.monotonic()
+        cache = self._day_index
+        cached = cache.get(source_chat_id)
+        if cached and now_monotonic - cached[0] < self._DAY_INDEX_TTL:
+            cache.move_to_end(source_chat_id)
+            return cached[1], cached[2]
+
+        goals = get_goal_manager().get_active_goals(chat_id=source_chat_id)
+        index = self._build_day_index(goals, today_date, current_time_minutes)
+        cache[source_chat_id] = (now_monotonic, bool(goals), index)
+        cache.move_to_end(source_chat_id)
+        if len(cache) > self._day_index_max_size:
+            cache.popitem(last=False)
+        return bool(goals), index
+
+    @staticmethod
+    def _normalize_created_at(created_at: Any) -> Tuple[float, Optional[str]]:
+        """
+        将创建时间规范化为 (时间戳, 日期字符串)
 
+        created_at 可能是 datetime 对象或ISO格式字符串，无法解析时返回 (0.0, None)
+        """
+        if not created_at:
+            return 0.0, None
+        if isinstance(created_at, str):
+            try:
+                created_at = datetime.fromisoformat(created_at)
+            except ValueError:
+                return 0.0, created_at[:10]
+        return created_at.timestamp(), created_at.date().isoformat()
+
+    def _build_day_index(self, goals: Sequence[Any], today_date: str, cutoff_minutes: int) -> _DayIndex:
+        """
+        构建日程区间索引：每个目标只解析一次时间窗口，按开始时间排序
+
+        在截止时间前已开始的条目不会再成为未来活动，若它已结束（或不是今天创建的）
+        也不可能成为当前活动；当天时间只会向后推进，因此构建时直接剔除，查询时不再扫描。
+
+        Args:
+            goals: 同一来源（全局或某个聊天）的活跃目标
+            today_date: 今天日期（YYYY-MM-DD）
+            cutoff_minutes: 截止分钟数（构建时的当前时间）
+
+        Returns:
+            当天的日程区间索引
+        """
+        entries = []
+        for goal in goals:
+            # 向后兼容：优先从parameters读取time_window，其次从conditions读取
+            time_window = get_raw_time_window(goal)
+            if not time_window:
+                continue
+
+            start_minutes, end_minutes = parse_time_window(time_window)
+            if start_minutes is None:
+                continue
+
+            # 检查是否是今天创建的任务（创建时间统一为时间戳+日期，查询时只做简单比较）
+            created_at_ts, created_date = self._normalize_created_at(goal.created_at)
+            is_today = created_date == today_date
+
+            # 已开始且已结束（或非今天创建）的条目既不是当前活动也不是未来活动
+            if start_minutes <= cutoff_minutes and (not is_today or end_minutes <= cutoff_minutes):
+                continue
+
+            entries.append(_ScheduleEntry(
+                start=start_minutes,
+                end=end_minutes,
+                time_str=format_minutes_to_time(start_minutes),  # 构建索引时格式化一次，查询时直接复用
+                name=goal.name,
+                description=goal.description,
+                goal_type=goal.goal_type,
+                is_today=is_today,
+                created_at_ts=created_at_ts,
+            ))
+
+        # 排序：按开始时间（稳定排序），排序后的位置用于同创建时间时的取舍
+        entries.sort(key=lambda entry: entry.start)
+
+        # 拆成按位置对齐的并行数组，并计算前缀最大结束时间
+        # （仅今天创建的条目可作为当前活动），用于查询时提前结束回溯
+        starts, ends, is_today, created_ts, today_max_ends = [], [], [], [], []
+        max_end = 0
+        for entry in entries:
+            starts.append(entry.start)
+            ends.append(entry.end)
+            is_today.append(entry.is_today)
+            created_ts.append(entry.created_at_ts)
+            if entry.is_today and entry.end > max_end:
+                max_end = entry.end
+            today_max_ends.append(max_end)
+
+        return _DayIndex(
+            starts=tuple(starts),
+            ends=tuple(ends),
+            is_today=tuple(is_today),
+            created_ts=tuple(created_ts),
+            today_max_ends=tuple(today_max_ends),
+            overnight_positions=tuple(
+                position for position, entry in enumerate(entries)
+                if entry.is_today and entry.end > 1440
+            ),
+            entries=tuple(entries),
+            activity_items=tuple((entry.time_str, entry.name) for entry in entries),
+        )
 
 # ===== Commands =====
 
@@ -14,7 +14,7 @@
 
 from .intent_classifier import IntentClassifier, UserIntent
 from .content_template import ContentTemplateEngine
-from .inject_optimizer import InjectOptimizer
+from .inject_optimizer import InjectOptimizer, InjectRecord
 from .state_analyzer import ActivityStateAnalyzer, ActivityState
 from .context_cache import ConversationContextCache, ConversationTurn
 
@@ -23,6 +23,7 @@ __all__ = [
     'UserIntent',
     'ContentTemplateEngine',
     'InjectOptimizer',
+    'InjectRecord',
     'ActivityStateAnalyzer',
     'ActivityState',
     'ConversationContextCache',
@@ -4,8 +4,12 @@
 提供多样化的表达模板，避免千篇一律的注入文本。
 """
 
+import functools
+import itertools
 import random
-from typing import List, Optional, Tuple
+import string
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
 from src.common.logger import get_logger
 
@@ -14,6 +18,38 @@ from .state_analyzer import ActivityState, ActivityStateAnalyzer
 
 logger = get_logger("autonomous_planning.content_template")
 
+# 常用回退文本（模块级常量）
+_DEFAULT_ACTIVITY = "休息"
+_NO_FUTURE_TEXT = "暂无后续安排"
+_NO_ACTIVITIES_TEXT = "暂无安排"
+
+
+class _CompiledTemplate(NamedTuple):
+    """预解析的模板：文本片段与字段名交替排列"""
+
+    parts: Tuple[Tuple[str, Optional[str]], ...]  # (字面文本, 字段名或None)
+    fields: FrozenSet[str]                        # 模板引用的字段名
+    simple: bool                                  # 是否只含 {name} 形式的字段（否则回退到 str.format）
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_template(template: str) -> _CompiledTemplate:
+    """解析模板字符串（每个模板只解析一次）
+
+    只含 {name} 字段的模板展开时直接拼接，不再逐次解析格式串；
+    带格式说明、转换符或属性/下标访问的模板标记为非简单模板，仍用 str.format 展开。
+    """
+    parts = []
+    fields = set()
+    simple = True
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if field is not None:
+            if format_spec or conversion or not field.isidentifier():
+                simple = False
+            fields.add(field)
+        parts.append((literal, field))
+    return _CompiledTemplate(tuple(parts), frozenset(fields), simple)
+
 
 class ContentTemplateEngine:
     """动态内容模板引擎
@@ -78,6 +114,11 @@ class ContentTemplateEngine:
             ],
         }
 
+        # 渲染结果缓存 (模板, 活动, 描述) -> 注入文本（LRU，最近使用的在末尾），只缓存不引用后续活动的模板
+        # 模板仍每次随机选择，缓存只跳过变量组装与拼接
+        self._content_cache: OrderedDict[tuple, Optional[str]] = OrderedDict()
+        self._content_cache_size = 256
+
         logger.debug("内容模板引擎初始化完成")
 
     def build_inject_content(
@@ -132,9 +173,45 @@ class ContentTemplateEngine:
             logger.debug("没有当前活动，跳过注入")
             return None
 
+        compiled = _compile_template(template)
+        if not compiled.simple or "future_activities" in compiled.fields:
+            # 引用后续活动的模板不缓存：以活动列表为键需要复制整个列表，开销与直接格式化相当
+            inject_content = self._render(compiled, template, current_activity, current_description, next_activities)
+            if inject_content is not None:
+                logger.debug(f"生成注入内容: intent={intent.value}, len={len(inject_content)}")
+            return inject_content
+
+        # 同一模板、同一活动的重复调用直接返回缓存结果
+        cache_key = (template, current_activity, current_description)
+        cache = self._content_cache
+        if cache_key in cache:
+            cache.move_to_end(cache_key)
+            return cache[cache_key]
+
+        inject_content = self._render(compiled, template, current_activity, current_description, next_activities)
+        cache[cache_key] = inject_content
+        if len(cache) > self._content_cache_size:
+            cache.popitem(last=False)
+        if inject_content is not None:
+            logger.debug(f"生成注入内容: intent={intent.value}, len={len(inject_content)}")
+        return inject_content
+
+    def _render(
+        self,
+        compiled: _CompiledTemplate,
+        template: str,
+        current_activity: Optional[str],
+        current_description: Optional[str],
+        next_activities: Optional[List[Tuple[str, str]]],
+    ) -> Optional[str]:
+        """用变量填充模板
+
+        Returns:
+            注入文本，模板变量缺失时返回None
+        """
         # 准备变量字典
-        variables = {
-            "activity": current_activity or "休息",
+        variables: Dict[str, str] = {
+            "activity": current_activity or _DEFAULT_ACTIVITY,
             "description": current_description or "",
         }
 
@@ -144,25 +221,35 @@ class ContentTemplateEngine:
         if current_description:
             activity_with_desc = f"{current_activity}（{current_description}）"
         else:
-            activity_with_desc = current_activity or "休息"
+            activity_with_desc = current_activity or _DEFAULT_ACTIVITY
 
         variables["activity_full"] = activity_with_desc
 
-        # 构建后续活动文本
-        if next_activities:
-            future_text = self._format_future_activities(next_activities)
-            variables["future_activities"] = future_text
-        else:
-            variables["future_activities"] = "暂无后续安排"
+        # 构建后续活动文本（只在模板引用时才格式化）
+        if not compiled.simple or "future_activities" in compiled.fields:
+            if next_activities:
+                variables["future_activities"] = self._format_future_activities(next_activities)
+            else:
+                variables["future_activities"] = _NO_FUTURE_TEXT
 
         # 填充模板变量
-        try:
-            inject_content = template.format(**variables)
-            logger.debug(f"生成注入内容: intent={intent.value}, len={len(inject_content)}")
-            return inject_content
-        except KeyError as e:
-            logger.warning(f"模板变量缺失: {e}")
-            return None
+        if compiled.simple:
+            # 模板引用的字段在编译时已知，直接检查缺失，不依赖异常
+            if not variables.keys() >= compiled.fields:
+                missing = ", ".join(sorted(compiled.fields - variables.keys()))
+                logger.warning(f"模板变量缺失: {missing}")
+                return None
+            inject_content = "".join(
+                literal if field is None else literal + variables[field]
+                for literal, field in compiled.parts
+            )
+        else:
+            try:
+                inject_content = template.format(**variables)
+            except KeyError as e:
+                logger.warning(f"模板变量缺失: {e}")
+                return None
+        return inject_content
 
     def _format_future_activities(
         self,
@@ -187,20 +274,13 @@ class ContentTemplateEngine:
             "14:00 学习\\n16:00 运动\\n18:00 晚饭"
         """
         if not activities:
-            return "暂无安排"
-
-        # 🆕 如果不限制数量，显示全部
-        if max_count is None:
-            limited_activities = activities
-        else:
-            limited_activities = activities[:max_count]
-
-        # 构建文本
-        lines = []
-        for time_str, activity_name in limited_activities:
-            lines.append(f"{time_str} {activity_name}")
+            return _NO_ACTIVITIES_TEXT
 
-        return "\n".join(lines)
+        # 🆕 max_count为None时显示全部（islice不复制列表）
+        return "\n".join(
+            f"{time_str} {activity_name}"
+            for time_str, activity_name in itertools.islice(activities, max_count)
+        )
 
     def build_simple_inject(
         self,
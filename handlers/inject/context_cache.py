@@ -4,19 +4,18 @@
 用于智能注入决策，判断是否需要在连续对话中继续注入日程信息。
 """
 
+import heapq
 import time
 from collections import deque
-from dataclasses import dataclass
-from typing import Dict, Optional, Deque
+from typing import Dict, List, NamedTuple, Optional, Deque, Tuple
 
 from src.common.logger import get_logger
 
 logger = get_logger("autonomous_planning.context_cache")
 
 
-@dataclass
-class ConversationTurn:
-    """对话轮次数据类"""
+class ConversationTurn(NamedTuple):
+    """对话轮次（不可变，创建后只读取字段）"""
     user_message: str      # 用户消息
     timestamp: float       # 时间戳
     intent: Optional[str]  # 识别的意图
@@ -53,6 +52,8 @@ class ConversationContextCache:
         self.max_turns = max_turns
         self.ttl = ttl
         self.user_contexts: Dict[str, Deque[ConversationTurn]] = {}
+        # 对话时间小顶堆 (时间戳, user_id)：清理时只弹出已过期的记录（惰性删除）
+        self._expiry_heap: List[Tuple[float, str]] = []
         self._last_cleanup = time.time()
 
         logger.debug(
@@ -76,10 +77,12 @@ class ConversationContextCache:
             injected: 是否注入了日程
             activity: 当时的活动
         """
+        now = time.time()
+
         # 创建对话轮次
         turn = ConversationTurn(
             user_message=user_message,
-            timestamp=time.time(),
+            timestamp=now,
             intent=intent,
             injected=injected,
             activity=activity
@@ -91,6 +94,7 @@ class ConversationContextCache:
 
         # 添加到队列（自动淘汰最旧的）
         self.user_contexts[user_id].append(turn)
+        heapq.heappush(self._expiry_heap, (now, user_id))
 
         logger.debug(
             f"记录对话: user={user_id}, "
@@ -99,7 +103,7 @@ class ConversationContextCache:
         )
 
         # 定期清理过期缓存
-        if time.time() - self._last_cleanup > 300:  # 每5分钟清理一次
+        if now - self._last_cleanup > 300:  # 每5分钟清理一次（复用本轮时间戳）
             self.cleanup_expired()
 
     def get_recent_turns(
@@ -116,20 +120,29 @@ class ConversationContextCache:
         Returns:
             对话轮次列表（从旧到新）
         """
-        if user_id not in self.user_contexts:
+        turns = self.user_contexts.get(user_id)
+        if not turns:
             return []
 
-        turns = list(self.user_contexts[user_id])
-
-        # 过滤过期的
-        current_time = time.time()
-        turns = [t for t in turns if current_time - t.timestamp < self.ttl]
+        # 队列按时间顺序追加，过期的轮次只可能位于队首
+        cutoff = time.time() - self.ttl
 
-        # 限制数量
+        # 只取最近几轮：从队尾向前取，遇到过期轮次即停止
         if count:
-            turns = turns[-count:]
-
-        return turns
+            recent = []
+            for turn in reversed(turns):
+                if turn.timestamp <= cutoff:
+                    break
+                recent.append(turn)
+                if len(recent) == count:
+                    break
+            recent.reverse()
+            return recent
+
+        # 全部未过期时直接复制，否则过滤掉队首过期的
+        if turns[0].timestamp > cutoff:
+            return list(turns)
+        return [t for t in turns if t.timestamp > cutoff]
 
     def is_schedule_topic_ongoing(self, user_id: str) -> bool:
         """判断用户是否在连续讨论日程话题
@@ -219,28 +232,26 @@ class ConversationContextCache:
         return False, None
 
     def cleanup_expired(self):
-        """清理过期的对话历史"""
-        current_time = time.time()
-        expired_users = []
+        """清理过期的对话历史
 
-        for user_id, turns in self.user_contexts.items():
-            # 过滤过期的轮次
-            valid_turns = deque(
-                (turn for turn in turns if current_time - turn.timestamp < self.ttl),
-                maxlen=self.max_turns
-            )
-
-            if len(valid_turns) == 0:
-                expired_users.append(user_id)
-            else:
-                self.user_contexts[user_id] = valid_turns
-
-        # 删除完全过期的用户
-        for user_id in expired_users:
-            del self.user_contexts[user_id]
-
-        if expired_users:
-            logger.debug(f"清理过期对话历史: 删除{len(expired_users)}个用户")
+        只弹出堆顶已过期的记录，删除最近一轮也已过期的用户；
+        仍活跃用户队列中的过期轮次由 get_recent_turns 读取时过滤（队列长度有上限）。
+        """
+        current_time = time.time()
+        cutoff = current_time - self.ttl
+        heap = self._expiry_heap
+        removed = 0
+
+        while heap and heap[0][0] <= cutoff:
+            _, user_id = heapq.heappop(heap)
+            turns = self.user_contexts.get(user_id)
+            # 用户之后又有新对话（或已被清除）时跳过
+            if turns is not None and (not turns or turns[-1].timestamp <= cutoff):
+                del self.user_contexts[user_id]
+                removed += 1
+
+        if removed:
+            logger.debug(f"清理过期对话历史: 删除{removed}个用户")
 
         self._last_cleanup = current_time
 
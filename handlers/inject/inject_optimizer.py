@@ -4,9 +4,11 @@
 通过记录注入历史、检查时间间隔等方式，优化注入策略。
 """
 
-import random
+import heapq
 import time
-from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 
 from src.common.logger import get_logger
 
@@ -14,6 +16,24 @@ from .intent_classifier import UserIntent
 
 logger = get_logger("autonomous_planning.inject_optimizer")
 
+# 从不注入的意图及其跳过原因（预先生成，避免每次调用构造列表和格式化字符串）
+_NO_INJECT_REASONS: Dict[UserIntent, str] = {
+    intent: f"{intent.value}场景，跳过注入"
+    for intent in (UserIntent.TECH_QUESTION, UserIntent.COMMAND_EXECUTION)
+}
+# 询问类意图：即使没有当前活动也可以注入
+_QUERY_INTENTS = frozenset({UserIntent.QUERY_CURRENT, UserIntent.QUERY_FUTURE})
+
+
+@dataclass(slots=True)
+class InjectRecord:
+    """用户注入历史记录（slots：字段为直接属性访问，无实例字典）"""
+    last_time: float        # 上次注入时间戳
+    last_activity: str      # 上次注入的活动
+    last_content: str       # 上次注入的内容
+    last_intent: str        # 上次注入时的意图
+    count: int = 1          # 累计注入次数
+
 
 class InjectOptimizer:
     """注入时机优化器
@@ -25,28 +45,37 @@ class InjectOptimizer:
     4. 管理注入历史缓存
 
     Attributes:
-        inject_history: 用户注入历史缓存
+        inject_history: 用户注入历史缓存（按最近注入排序）
         cache_ttl: 缓存过期时间（秒）
         casual_inject_probability: 闲聊时注入概率
+        max_users: 最多保留注入历史的用户数
     """
 
     def __init__(
         self,
         cache_ttl: int = 300,
-        casual_inject_probability: float = 0.5
+        casual_inject_probability: float = 0.5,
+        max_users: int = 1000
     ):
         """初始化注入优化器
 
         Args:
             cache_ttl: 缓存过期时间（秒），默认300秒（5分钟）
             casual_inject_probability: 闲聊时注入概率（0-1），默认0.5
+            max_users: 最多保留注入历史的用户数，超出时淘汰最久未注入的用户，默认1000
         """
-        # 用户注入历史缓存
-        # 结构：{user_id: {last_time, last_activity, last_content, count}}
-        self.inject_history: Dict[str, Dict] = {}
+        # 用户注入历史缓存（LRU：最近注入的用户在末尾，超出上限时淘汰队首）
+        self.inject_history: OrderedDict[str, InjectRecord] = OrderedDict()
+        self.max_users = max_users
+        # 注入时间小顶堆 (注入时间, user_id)：清理时只弹出已过期的记录（惰性删除，
+        # 用户再次注入后旧记录失效，弹出时按用户最新注入时间复核）
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._last_cleanup = time.time()
 
         self.cache_ttl = cache_ttl
         self.casual_inject_probability = casual_inject_probability
+        # 闲聊注入采样计数器（黄金比例 Weyl 序列，均匀分布且无需随机数生成器）
+        self._casual_counter = 0
 
         logger.debug(
             f"注入优化器初始化完成: TTL={cache_ttl}秒, "
@@ -86,36 +115,28 @@ class InjectOptimizer:
             >>> optimizer.should_inject("user1", UserIntent.TECH_QUESTION, "学习")
             (False, "技术问答场景，跳过注入")
         """
-        current_time = time.time()
-
         # 规则1：技术问答/命令执行 → 不注入
-        if intent in [UserIntent.TECH_QUESTION, UserIntent.COMMAND_EXECUTION]:
-            reason = f"{intent.value}场景，跳过注入"
+        reason = _NO_INJECT_REASONS.get(intent)
+        if reason is not None:
             logger.debug(f"注入决策: user={user_id}, 拒绝, 原因={reason}")
             return False, reason
 
         # 规则2：无当前活动且非询问意图 → 不注入
-        if not current_activity and intent not in [
-            UserIntent.QUERY_CURRENT,
-            UserIntent.QUERY_FUTURE
-        ]:
+        if not current_activity and intent not in _QUERY_INTENTS:
             reason = "无当前活动且非询问意图"
             logger.debug(f"注入决策: user={user_id}, 拒绝, 原因={reason}")
             return False, reason
 
         # 规则3：检查注入历史，防止短时间重复
-        if user_id in self.inject_history:
-            history = self.inject_history[user_id]
-            last_time = history.get("last_time", 0)
-            last_activity = history.get("last_activity", "")
-            last_intent = history.get("last_intent", "")  # 🆕 获取上次意图
-            time_elapsed = current_time - last_time
+        history = self.inject_history.get(user_id)
+        if history is not None:
+            time_elapsed = time.time() - history.last_time
 
             # 🆕 优化：只有当活动相同 AND 意图相同时才认为是重复
             # 例外：query_future（询问未来）意图不受限制，因为用户可能询问不同时间段
             #      （如先问"下午呢"再问"晚上呢"，应该返回不同的内容）
-            is_same_intent = last_intent == intent.value
-            is_same_activity = last_activity == current_activity
+            is_same_intent = history.last_intent == intent.value  # 🆕 比较上次意图
+            is_same_activity = history.last_activity == current_activity
 
             # 🆕 query_future 意图豁免：允许短时间内多次询问未来计划
             if intent == UserIntent.QUERY_FUTURE:
@@ -127,7 +148,9 @@ class InjectOptimizer:
 
         # 规则4：闲聊意图 → 概率性注入
         if intent == UserIntent.CASUAL_CHAT:
-            if random.random() > self.casual_inject_probability:
+            self._casual_counter += 1
+            sample = (self._casual_counter * 0x9E3779B1) & 0xFFFFFFFF
+            if sample > self.casual_inject_probability * 0xFFFFFFFF:
                 reason = f"闲聊意图，随机决策不注入（概率={self.casual_inject_probability}）"
                 logger.debug(f"注入决策: user={user_id}, 拒绝, 原因={reason}")
                 return False, reason
@@ -162,46 +185,56 @@ class InjectOptimizer:
             intent: 用户意图（可选）
         """
         current_time = time.time()
-
-        if user_id not in self.inject_history:
-            self.inject_history[user_id] = {
-                "last_time": current_time,
-                "last_activity": activity,
-                "last_content": content,
-                "last_intent": intent.value if intent else "",  # 🆕 记录意图
-                "count": 1,
-            }
+        intent_value = intent.value if intent else ""  # 🆕 记录意图
+
+        history = self.inject_history.get(user_id)
+        if history is None:
+            history = InjectRecord(current_time, activity, content, intent_value)
+            self.inject_history[user_id] = history
+            # 容量淘汰：移除最久未注入的用户（其堆记录在弹出时被跳过）
+            if len(self.inject_history) > self.max_users:
+                self.inject_history.popitem(last=False)
         else:
-            history = self.inject_history[user_id]
-            history["last_time"] = current_time
-            history["last_activity"] = activity
-            history["last_content"] = content
-            history["last_intent"] = intent.value if intent else ""  # 🆕 记录意图
-            history["count"] = history.get("count", 0) + 1
+            history.last_time = current_time
+            history.last_activity = activity
+            history.last_content = content
+            history.last_intent = intent_value
+            history.count += 1
+            self.inject_history.move_to_end(user_id)
+        heapq.heappush(self._expiry_heap, (current_time, user_id))
 
         logger.debug(
             f"记录注入: user={user_id}, activity={activity}, "
-            f"total_count={self.inject_history[user_id]['count']}"
+            f"total_count={history.count}"
         )
 
+        # 定期清理过期缓存（每个TTL周期一次）
+        if current_time - self._last_cleanup > self.cache_ttl:
+            self.cleanup_expired_cache()
+
     def cleanup_expired_cache(self):
         """清理过期的缓存项
 
         删除超过TTL的历史记录，防止内存无限增长。
+        只弹出堆顶已过期的记录，开销与过期数量成正比，而不是与用户总数成正比。
         """
         current_time = time.time()
-        expired_users = []
+        cutoff = current_time - self.cache_ttl * 2  # 2倍TTL后清理
+        heap = self._expiry_heap
+        removed = 0
 
-        for user_id, history in self.inject_history.items():
-            last_time = history.get("last_time", 0)
-            if current_time - last_time > self.cache_ttl * 2:  # 2倍TTL后清理
-                expired_users.append(user_id)
+        while heap and heap[0][0] < cutoff:
+            _, user_id = heapq.heappop(heap)
+            history = self.inject_history.get(user_id)
+            # 用户之后又有注入（或已被重置）时跳过
+            if history is not None and history.last_time < cutoff:
+                del self.inject_history[user_id]
+                removed += 1
 
-        for user_id in expired_users:
-            del self.inject_history[user_id]
+        self._last_cleanup = current_time
 
-        if expired_users:
-            logger.debug(f"清理过期缓存: 删除{len(expired_users)}个用户的历史记录")
+        if removed:
+            logger.debug(f"清理过期缓存: 删除{removed}个用户的历史记录")
 
     def get_user_inject_stats(self, user_id: str) -> Optional[Dict]:
         """获取用户的注入统计信息
@@ -221,18 +254,15 @@ class InjectOptimizer:
                 "time_since_last": 120.5
             }
         """
-        if user_id not in self.inject_history:
+        history = self.inject_history.get(user_id)
+        if history is None:
             return None
 
-        history = self.inject_history[user_id]
-        current_time = time.time()
-        last_time = history.get("last_time", 0)
-
         return {
-            "last_time": last_time,
-            "last_activity": history.get("last_activity", ""),
-            "count": history.get("count", 0),
-            "time_since_last": current_time - last_time,
+            "last_time": history.last_time,
+            "last_activity": history.last_activity,
+            "count": history.count,
+            "time_since_last": time.time() - history.last_time,
         }
 
     def reset_user_history(self, user_id: str):
@@ -251,7 +281,7 @@ class InjectOptimizer:
         Returns:
             总注入次数
         """
-        return sum(h.get("count", 0) for h in self.inject_history.values())
+        return sum(h.count for h in self.inject_history.values())
 
     def get_active_users_count(self) -> int:
         """获取活跃用户数量（有注入历史的用户）
@@ -4,16 +4,30 @@
 通过关键词匹配和权重评分，准确识别用户是否在询问当前状态、未来计划等。
 """
 
+import functools
+import logging
 import re
 from enum import Enum
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional, Set
 from dataclasses import dataclass
 
 from src.common.logger import get_logger
 
+from ...utils.keyword_matcher import KeywordMatcher
+from ...utils.log_utils import is_log_enabled
+
 logger = get_logger("autonomous_planning.intent_classifier")
 
 
+# 强指示词：命中时对应意图分数加权
+_CURRENT_BOOST_KEYWORDS = frozenset({"正在", "在做", "在干", "现在", "当前"})
+_FUTURE_BOOST_KEYWORDS = frozenset({"接下来", "等下", "计划", "安排", "打算"})
+# 表示最近状态的时间词（与活动动词组合时判定为询问当前状态）
+_RECENT_KEYWORDS = frozenset({"刚", "刚才", "刚刚", "在"})
+# 极短消息的最大长度（此长度内的常见消息走预计算快速路径）
+_TINY_MESSAGE_LEN = 3
+
+
 @dataclass
 class TimeRange:
     """时间范围数据类"""
@@ -32,6 +46,17 @@ class UserIntent(Enum):
     UNKNOWN = "unknown"                      # 未知意图
 
 
+# 意图中文描述（静态映射，模块加载时构建一次）
+_INTENT_DESCRIPTIONS: Dict[UserIntent, str] = {
+    UserIntent.QUERY_CURRENT: "询问当前状态",
+    UserIntent.QUERY_FUTURE: "询问未来计划",
+    UserIntent.CASUAL_CHAT: "闲聊寒暄",
+    UserIntent.TECH_QUESTION: "技术问答",
+    UserIntent.COMMAND_EXECUTION: "命令执行",
+    UserIntent.UNKNOWN: "未知意图",
+}
+
+
 class IntentClassifier:
     """意图分类器 - 基于规则的轻量级实现
 
@@ -120,6 +145,37 @@ class IntentClassifier:
         # 预编译正则表达式（性能优化）
         self._command_regex = re.compile('|'.join(self.command_patterns))
 
+        # 所有关键词合并为一个匹配器：每条消息只扫描一次，各类别分数由命中集合计算
+        self._keyword_matcher = KeywordMatcher(
+            self.current_keywords | self.activity_verbs | self.future_keywords
+            | self.tech_keywords | self.casual_keywords
+            | _CURRENT_BOOST_KEYWORDS | _FUTURE_BOOST_KEYWORDS | _RECENT_KEYWORDS
+        )
+        # 关键词权重（长关键词权重更高，防止误匹配），构建时算好，评分时直接查表
+        self._keyword_weights: Dict[str, float] = {
+            keyword: len(keyword) / 5.0 for keyword in self._keyword_matcher.keywords  # 归一化权重
+        }
+        # 时间段词匹配器：一次扫描找出出现的时间段词，再按映射表顺序取优先者
+        self._time_word_matcher = KeywordMatcher(self.time_ranges)
+        # 按优先级排列的 (时间段词, 时间范围) 元组，避免每次遍历字典视图
+        self._time_range_items = tuple(self.time_ranges.items())
+
+        # 常见极短消息（"在吗"、"ok"、"嗯？"等）的分类结果：由常规分类路径预先算好，
+        # 查询时一次字典查找即可返回，结果与常规路径完全一致
+        tiny_candidates = self.casual_keywords | self.current_keywords
+        tiny_candidates |= {word + mark for word in tiny_candidates for mark in ("?", "？")}
+        self._tiny_map: Dict[str, Tuple[UserIntent, float]] = {
+            word: self._classify_normalized(word)
+            for word in tiny_candidates
+            if len(word) <= _TINY_MESSAGE_LEN
+        }
+
+        # 分类结果缓存（LRU，键为规范化后的消息）：重复消息（"在吗"、"ok"等）直接返回。
+        # 结果只取决于消息和上面构建好的关键词表；functools.lru_cache 内部加锁，
+        # 共享实例被多个处理器并发调用时缓存结构也保持一致
+        self._classify_cached = functools.lru_cache(maxsize=1024)(self._classify_normalized)
+        self._time_range_cached = functools.lru_cache(maxsize=1024)(self._extract_time_range_normalized)
+
         logger.debug("意图分类器初始化完成")
 
     def classify(self, message: str) -> Tuple[UserIntent, float]:
@@ -151,59 +207,88 @@ class IntentClassifier:
 
         message = message.strip().lower()
 
+        # 极短消息快速路径
+        if len(message) <= _TINY_MESSAGE_LEN:
+            result = self._tiny_map.get(message)
+            if result is not None:
+                return result
+
+        return self._classify_cached(message)
+
+    def _classify_normalized(self, message: str) -> Tuple[UserIntent, float]:
+        """对已规范化（去除首尾空白并转小写）的消息进行分类
+
+        Args:
+            message: 规范化后的用户消息文本
+
+        Returns:
+            (意图类型, 置信度分数 0-1)
+        """
+        debug = is_log_enabled(logger, logging.DEBUG)
+
         # 🔍 调试：记录原始消息（前50字符）
-        logger.debug(f"意图分类输入: '{message[:50]}...'")
+        if debug:
+            logger.debug(f"意图分类输入: '{message[:50]}...'")
 
         # 1. 命令检测（最高优先级，置信度1.0）
         if self._command_regex.match(message):
-            logger.debug(f"检测到命令: {message[:20]}...")
+            if debug:
+                logger.debug(f"检测到命令: {message[:20]}...")
             return UserIntent.COMMAND_EXECUTION, 1.0
 
+        # 一次扫描得到消息中出现的全部关键词
+        found = self._keyword_matcher.find_all(message)
+
         # 2. 技术问答检测
-        tech_score = self._calculate_keyword_score(message, self.tech_keywords)
+        tech_score = self._calculate_keyword_score(found, self.tech_keywords)
         if tech_score > 0.5:
-            logger.debug(f"检测到技术问答: score={tech_score:.2f}")
+            if debug:
+                logger.debug(f"检测到技术问答: score={tech_score:.2f}")
             return UserIntent.TECH_QUESTION, tech_score
 
         # 3. 询问当前状态检测
-        current_score = self._calculate_keyword_score(message, self.current_keywords)
+        current_score = self._calculate_keyword_score(found, self.current_keywords)
 
         # 特殊增强：包含"正在/在做/现在"等强指示词，分数加权
-        if any(kw in message for kw in ["正在", "在做", "在干", "现在", "当前"]):
+        has_activity_verb = not found.isdisjoint(self.activity_verbs)
+        if not found.isdisjoint(_CURRENT_BOOST_KEYWORDS):
             current_score = min(1.0, current_score * 1.5)
 
         # 🆕 反问句检测："你不是...吗" 模式
         if ("你不是" in message or "不是" in message) and ("吗" in message or "?" in message or "？" in message):
             # 检查是否包含活动动词
-            if any(verb in message for verb in self.activity_verbs):
+            if has_activity_verb:
                 logger.debug(f"检测到反问句 + 活动动词，判定为询问当前状态")
                 current_score = max(current_score, 0.85)
 
         # 🆕 活动动词 + 时间词检测："刚吃完"、"在聊天" 等
-        if any(verb in message for verb in self.activity_verbs):
-            if any(kw in message for kw in ["刚", "刚才", "刚刚", "在"]):
+        if has_activity_verb:
+            if not found.isdisjoint(_RECENT_KEYWORDS):
                 logger.debug(f"检测到活动动词 + 时间词，判定为询问当前状态")
                 current_score = max(current_score, 0.80)
 
         if current_score > 0.4:
-            logger.debug(f"检测到询问当前状态: score={current_score:.2f}")
+            if debug:
+                logger.debug(f"检测到询问当前状态: score={current_score:.2f}")
             return UserIntent.QUERY_CURRENT, current_score
 
         # 4. 询问未来计划检测
-        future_score = self._calculate_keyword_score(message, self.future_keywords)
+        future_score = self._calculate_keyword_score(found, self.future_keywords)
 
         # 特殊增强：包含"接下来/等下/计划"等强指示词，分数加权
-        if any(kw in message for kw in ["接下来", "等下", "计划", "安排", "打算"]):
+        if not found.isdisjoint(_FUTURE_BOOST_KEYWORDS):
             future_score = min(1.0, future_score * 1.5)
 
         if future_score > 0.4:
-            logger.debug(f"检测到询问未来计划: score={future_score:.2f}")
+            if debug:
+                logger.debug(f"检测到询问未来计划: score={future_score:.2f}")
             return UserIntent.QUERY_FUTURE, future_score
 
         # 5. 闲聊寒暄检测
-        casual_score = self._calculate_keyword_score(message, self.casual_keywords)
+        casual_score = self._calculate_keyword_score(found, self.casual_keywords)
         if casual_score > 0.3:
-            logger.debug(f"检测到闲聊寒暄: score={casual_score:.2f}")
+            if debug:
+                logger.debug(f"检测到闲聊寒暄: score={casual_score:.2f}")
             return UserIntent.CASUAL_CHAT, casual_score
 
         # 6. 短消息 + 问号 → 可能是询问当前状态
@@ -217,7 +302,7 @@ class IntentClassifier:
         logger.debug("未匹配到明确意图，归类为闲聊")
         return UserIntent.CASUAL_CHAT, 0.40
 
-    def _calculate_keyword_score(self, message: str, keywords: set) -> float:
+    def _calculate_keyword_score(self, found: Set[str], keywords: set) -> float:
         """计算关键词匹配分数
 
         算法：
@@ -226,27 +311,18 @@ class IntentClassifier:
         3. 归一化到 0-1 范围
 
         Args:
-            message: 用户消息文本（已转小写）
+            found: 消息中出现的全部关键词（由合并匹配器一次扫描得到）
             keywords: 关键词集合
 
         Returns:
             匹配分数 (0-1)
         """
-        if not keywords:
+        matched = keywords & found
+        if not matched:
             return 0.0
 
-        matched_count = 0
-        total_weight = 0.0
-
-        for keyword in keywords:
-            if keyword in message:
-                matched_count += 1
-                # 长关键词权重更高（防止误匹配）
-                weight = len(keyword) / 5.0  # 归一化权重
-                total_weight += weight
-
-        if matched_count == 0:
-            return 0.0
+        matched_count = len(matched)
+        total_weight = sum(map(self._keyword_weights.__getitem__, matched))
 
         # 归一化：考虑匹配数量和权重
         # 至少匹配1个得分0.4，匹配3个以上得分接近1.0
@@ -266,15 +342,7 @@ class IntentClassifier:
         Returns:
             中文描述字符串
         """
-        descriptions = {
-            UserIntent.QUERY_CURRENT: "询问当前状态",
-            UserIntent.QUERY_FUTURE: "询问未来计划",
-            UserIntent.CASUAL_CHAT: "闲聊寒暄",
-            UserIntent.TECH_QUESTION: "技术问答",
-            UserIntent.COMMAND_EXECUTION: "命令执行",
-            UserIntent.UNKNOWN: "未知意图",
-        }
-        return descriptions.get(intent, "未知")
+        return _INTENT_DESCRIPTIONS.get(intent, "未知")
 
     def extract_time_range(self, message: str) -> Optional[TimeRange]:
         """🆕 从用户消息中提取时间段
@@ -297,12 +365,23 @@ class IntentClassifier:
         if not message:
             return None
 
-        message_lower = message.lower().strip()
+        return self._time_range_cached(message.strip().lower())
 
-        # 按优先级匹配时间段（从长到短，避免误匹配）
-        for time_word, time_range in self.time_ranges.items():
-            if time_word in message_lower:
-                logger.debug(f"识别到时间段: {time_word} ({time_range.start_hour}-{time_range.end_hour}时)")
-                return time_range
+    def _extract_time_range_normalized(self, message: str) -> Optional[TimeRange]:
+        """从已规范化的消息中提取时间段
+
+        Args:
+            message: 规范化后的用户消息文本
 
+        Returns:
+            TimeRange对象，如果未识别到时间段则返回None
+        """
+        found = self._time_word_matcher.find_all(message)
+        if found:
+            # 按优先级匹配时间段（映射表顺序，避免误匹配）
+            for time_word, time_range in self._time_range_items:
+                if time_word in found:
+                    if is_log_enabled(logger, logging.DEBUG):
+                        logger.debug(f"识别到时间段: {time_word} ({time_range.start_hour}-{time_range.end_hour}时)")
+                    return time_range
         return None
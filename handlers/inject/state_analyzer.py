@@ -4,12 +4,15 @@
 根据活动类型和进度，动态生成自然的状态文本。
 """
 
+import logging
 import random
 from enum import Enum
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from src.common.logger import get_logger
 
+from ...utils.log_utils import is_log_enabled
+
 logger = get_logger("autonomous_planning.state_analyzer")
 
 
@@ -21,6 +24,10 @@ class ActivityState(Enum):
     UNKNOWN = "unknown"                  # 未知状态
 
 
+# 按进度阶段排列的状态（下标 0/1/2 对应 刚开始/进行中/即将结束）
+_PROGRESS_STATES = (ActivityState.JUST_STARTED, ActivityState.IN_PROGRESS, ActivityState.ALMOST_DONE)
+
+
 class ActivityStateAnalyzer:
     """活动状态分析器
 
@@ -31,6 +38,7 @@ class ActivityStateAnalyzer:
 
     Attributes:
         emotion_templates: 按活动类型和状态分类的情感描述模板库
+            （构建后视为只读；扩展模板请使用 add_emotion_template，直接修改不会生效）
     """
 
     def __init__(self):
@@ -202,8 +210,51 @@ class ActivityStateAnalyzer:
             },
         }
 
+        self._build_emotion_table()
+        # 分析器自有的随机数生成器（不共享全局随机状态，测试时可单独设定种子）
+        self._rng = random.Random()
+
         logger.debug("活动状态分析器初始化完成")
 
+    def _build_emotion_table(self):
+        """由 emotion_templates 构建扁平化模板表
+
+        所有描述存于一个元组，(活动类型, 状态) -> [起, 止) 下标区间，
+        选择描述时只需一次字典查找和一次整数随机数。
+        """
+        flat: List[str] = []
+        slices: Dict[Tuple[str, ActivityState], Tuple[int, int]] = {}
+        for activity_type, states in self.emotion_templates.items():
+            for state, descriptions in states.items():
+                slices[(activity_type, state)] = (len(flat), len(flat) + len(descriptions))
+                flat.extend(descriptions)
+        # 区间表与描述元组放在同一元组中整体替换，并发读取不会拿到不匹配的一对
+        self._emotion_table: Tuple[Dict[Tuple[str, ActivityState], Tuple[int, int]], Tuple[str, ...]] = (
+            slices, tuple(flat)
+        )
+
+    def add_emotion_template(
+        self,
+        activity_type: str,
+        state: ActivityState,
+        description: str
+    ):
+        """添加自定义情感描述
+
+        允许动态扩展模板库，添加后重建扁平化模板表。
+
+        Args:
+            activity_type: 活动类型（study/meal/entertainment等，不存在时新建）
+            state: 活动状态
+            description: 情感描述文本
+
+        Examples:
+            >>> analyzer.add_emotion_template("study", ActivityState.IN_PROGRESS, "正学得起劲")
+        """
+        self.emotion_templates.setdefault(activity_type, {}).setdefault(state, []).append(description)
+        self._build_emotion_table()
+        logger.debug(f"添加情感描述模板: type={activity_type}, state={state.value}")
+
     def analyze_activity_state(
         self,
         activity_name: str,
@@ -241,21 +292,17 @@ class ActivityStateAnalyzer:
         elapsed = current_minutes - start_minutes
         progress = elapsed / total_duration  # 进度百分比 (0-1)
 
-        # 判断状态
-        if progress < 0.1:
-            state = ActivityState.JUST_STARTED
-        elif progress > 0.8:
-            state = ActivityState.ALMOST_DONE
-        else:
-            state = ActivityState.IN_PROGRESS
+        # 判断状态：<10% 刚开始，>80% 即将结束，其余为进行中（两个比较结果相加即为下标）
+        state = _PROGRESS_STATES[(progress >= 0.1) + (progress > 0.8)]
 
         # 生成情感描述
         emotion_text = self.generate_emotion_text(activity_type, state)
 
-        logger.debug(
-            f"状态分析: {activity_name} 进度{progress:.0%} "
-            f"({elapsed}/{total_duration}分钟) → {state.value}"
-        )
+        if is_log_enabled(logger, logging.DEBUG):
+            logger.debug(
+                f"状态分析: {activity_name} 进度{progress:.0%} "
+                f"({elapsed}/{total_duration}分钟) → {state.value}"
+            )
 
         return state, emotion_text
 
@@ -279,20 +326,21 @@ class ActivityStateAnalyzer:
             "学了一会儿了，还算专注"  # 随机选择的一种
         """
         # 获取对应活动类型的模板，不存在则使用custom
-        templates = self.emotion_templates.get(activity_type)
-        if not templates:
-            logger.debug(f"未知活动类型 {activity_type}，使用默认模板")
-            templates = self.emotion_templates.get("custom", {})
-
-        # 获取对应状态的描述列表
-        descriptions = templates.get(state, [])
-        if not descriptions:
-            logger.debug(f"未找到状态 {state} 的描述模板")
+        if not self.emotion_templates.get(activity_type):
+            if is_log_enabled(logger, logging.DEBUG):
+                logger.debug(f"未知活动类型 {activity_type}，使用默认模板")
+            activity_type = "custom"
+
+        # 获取对应状态的描述区间
+        slices, flat = self._emotion_table
+        start, end = slices.get((activity_type, state), (0, 0))
+        if start == end:
+            if is_log_enabled(logger, logging.DEBUG):
+                logger.debug(f"未找到状态 {state} 的描述模板")
             return ""
 
         # 随机选择一个描述（增加多样性）
-        selected = random.choice(descriptions)
-        return selected
+        return flat[start + self._rng.randrange(end - start)]
 
     def get_progress_description(
         self,
@@ -4,6 +4,7 @@ This module provides prompt building functionality for schedule generation.
 Separated from BaseScheduleGenerator to follow Single Responsibility Principle.
 """
 
+import json
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -205,7 +206,6 @@ daily_routine(作息)|meal(吃饭)|study(学习)|entertainment(娱乐)|social_ma
 
         # 添加Schema约束（精简版）
         if schema:
-            import json
             schema_desc = f"""
 【Schema要求】
 - {min_activities}-{max_activities}个活动（必须）
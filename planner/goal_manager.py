@@ -29,11 +29,15 @@ Example:
     ... )
 """
 
+import itertools
+import os
+import sys
+import threading
 import uuid
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.common.logger import get_logger
 
@@ -42,6 +46,9 @@ from ..utils.timezone_manager import TimezoneManager
 
 logger = get_logger("autonomous_planning.goal_manager")
 
+# 默认时区的共享时区管理器：Goal 的时间计算都使用默认时区，无需每次调用都新建
+_default_tz_manager = TimezoneManager()
+
 
 class GoalStatus(Enum):
     """Goal status enumeration."""
@@ -59,6 +66,31 @@ class GoalPriority(Enum):
     LOW = "low"
 
 
+# 状态/优先级查找表：字符串值和枚举成员本身都映射到枚举（构建 Goal 时直接查表）
+_STATUS_MAP = {status.value: status for status in GoalStatus}
+_STATUS_MAP.update({status: status for status in GoalStatus})
+_PRIORITY_MAP = {priority.value: priority for priority in GoalPriority}
+_PRIORITY_MAP.update({priority: priority for priority in GoalPriority})
+
+# Summary display tables (static, built once)
+_STATUS_EMOJI = {
+    GoalStatus.ACTIVE: "🟢",
+    GoalStatus.PAUSED: "⏸️",
+    GoalStatus.COMPLETED: "✅",
+    GoalStatus.CANCELLED: "❌",
+    GoalStatus.FAILED: "💔",
+}
+
+_PRIORITY_EMOJI = {
+    GoalPriority.HIGH: "🔴",
+    GoalPriority.MEDIUM: "🟡",
+    GoalPriority.LOW: "🟢",
+}
+
+# 总览中活跃目标的排序（high > medium > low）
+_PRIORITY_ORDER = {GoalPriority.HIGH: 0, GoalPriority.MEDIUM: 1, GoalPriority.LOW: 2}
+
+
 class Goal:
     """Goal class representing a single goal.
 
@@ -80,6 +112,14 @@ class Goal:
         execution_count: Number of executions
     """
 
+    # 固定属性集合：不为每个实例分配 __dict__（查询时会批量创建 Goal 对象）
+    __slots__ = (
+        "goal_id", "name", "description", "goal_type", "priority",
+        "creator_id", "chat_id", "status", "created_at", "deadline",
+        "conditions", "parameters", "progress", "last_executed_at",
+        "execution_count",
+    )
+
     def __init__(
         self,
         goal_id: str,
@@ -103,14 +143,13 @@ class Goal:
         self.name = name
         self.description = description
         self.goal_type = goal_type
-        self.priority = priority if isinstance(priority, GoalPriority) else GoalPriority(priority)
+        self.priority = _PRIORITY_MAP.get(priority) or GoalPriority(priority)
         self.creator_id = creator_id
         self.chat_id = chat_id
-        self.status = status if isinstance(status, GoalStatus) else GoalStatus(status)
+        self.status = _STATUS_MAP.get(status) or GoalStatus(status)
         # 使用时区感知时间（向后兼容）
         if created_at is None:
-            tz_manager = TimezoneManager()  # 使用默认时区
-            created_at = tz_manager.get_now()
+            created_at = _default_tz_manager.get_now()  # 使用默认时区
         self.created_at = created_at
         self.deadline = deadline
         self.conditions = conditions or {}
@@ -162,7 +201,7 @@ class Goal:
             goal_id=data["goal_id"],
             name=data["name"],
             description=data["description"],
-            goal_type=data["goal_type"],
+            goal_type=sys.intern(data["goal_type"]),  # 取值很少，所有目标共享同一字符串
             priority=data["priority"],
             creator_id=data["creator_id"],
             chat_id=data["chat_id"],
@@ -193,69 +232,59 @@ class Goal:
         except (ValueError, TypeError):
             return None
 
-    def should_execute_now(self) -> bool:
+    def should_execute_now(self, now: Optional[datetime] = None) -> bool:
         """Check if goal should be executed now.
 
+        Args:
+            now: Current time (callers checking many goals pass one snapshot)
+
         Returns:
             True if goal should be executed, False otherwise
         """
         if self.status != GoalStatus.ACTIVE:
             return False
 
+        if now is None:
+            now = _default_tz_manager.get_now()
+
         # Check time_window if present
         time_window = self.parameters.get("time_window") if self.parameters else None
         if time_window and isinstance(time_window, list) and len(time_window) == 2:
-            tz_manager = TimezoneManager()
-            now = tz_manager.get_now()
             current_minutes = now.hour * 60 + now.minute
             if not (time_window[0] <= current_minutes <= time_window[1]):
                 return False
 
         # Check deadline
-        tz_manager = TimezoneManager()
-        if self.deadline and tz_manager.get_now() > self.deadline:
+        if self.deadline and now > self.deadline:
             return False
 
         return True
 
     def mark_executed(self):
         """Mark goal as executed."""
-        tz_manager = TimezoneManager()
-        self.last_executed_at = tz_manager.get_now()
+        self.last_executed_at = _default_tz_manager.get_now()
         self.execution_count += 1
 
-    def get_summary(self) -> str:
+    def get_summary(self, now: Optional[datetime] = None) -> str:
         """Get goal summary.
 
+        Args:
+            now: Current time for the deadline countdown (defaults to now)
+
         Returns:
             Formatted summary string
         """
-        status_emoji = {
-            GoalStatus.ACTIVE: "🟢",
-            GoalStatus.PAUSED: "⏸️",
-            GoalStatus.COMPLETED: "✅",
-            GoalStatus.CANCELLED: "❌",
-            GoalStatus.FAILED: "💔",
-        }
-
-        priority_emoji = {
-            GoalPriority.HIGH: "🔴",
-            GoalPriority.MEDIUM: "🟡",
-            GoalPriority.LOW: "🟢",
-        }
-
         lines = [
-            f"{status_emoji[self.status]} 目标: {self.name}",
+            f"{_STATUS_EMOJI[self.status]} 目标: {self.name}",
             f"   ID: {self.goal_id[:8]}...",
             f"   聊天流: {self.chat_id}",
-            f"   优先级: {priority_emoji[self.priority]} {self.priority.value}",
+            f"   优先级: {_PRIORITY_EMOJI[self.priority]} {self.priority.value}",
             f"   进度: {self.progress}%",
             f"   执行次数: {self.execution_count}",
         ]
 
         if self.deadline:
-            tz_manager = TimezoneManager()
-            time_left = self.deadline - tz_manager.get_now()
+            time_left = self.deadline - (now or _default_tz_manager.get_now())
             if time_left.total_seconds() > 0:
                 days = time_left.days
                 hours = time_left.seconds // 3600
@@ -283,6 +312,11 @@ class GoalManager:
     Args:
         data_dir: Directory for database file (default: plugin_dir/data)
         db_name: Database file name (default: goals.db)
+
+    Attributes:
+        version: Data version, bumped on every goal mutation. Callers can
+            include it in cache keys so cached reads stay valid until the
+            goals actually change.
     """
 
     def __init__(self, data_dir: str = None, db_name: str = "goals.db"):
@@ -297,10 +331,21 @@ class GoalManager:
         self.db = GoalDatabase(db_path=str(db_path), backup_on_init=True)
 
         # Initialize timezone manager
-        self.tz_manager = TimezoneManager()
+        self.tz_manager = _default_tz_manager
+
+        # 数据版本号（每次修改目标后递增，itertools.count 的 next() 在CPython中是原子的）
+        self._version_counter = itertools.count(1)
+        self.version = 0
+
+        # (chat_id, 日期) -> (数据版本号, 是否有日程)，版本号变化后自动失效
+        self._schedule_dates: Dict[Tuple[str, str], Tuple[int, bool]] = {}
 
         logger.debug(f"GoalManager initialized with database: {db_path}")
 
+    def _bump_version(self):
+        """Mark goal data as changed."""
+        self.version = next(self._version_counter)
+
     def create_goal(
         self,
         name: str,
@@ -347,6 +392,7 @@ class GoalManager:
             conditions=conditions,
             parameters=parameters,
         )
+        self._bump_version()
 
         # Return Goal object
         goal = Goal(
@@ -365,6 +411,43 @@ class GoalManager:
         logger.debug(f"Created goal: {name} (ID: {goal_id})")
         return goal
 
+    @staticmethod
+    def _new_goal_ids(count: int) -> List[str]:
+        """Generate random (version 4) UUID strings from a single urandom read."""
+        random_bytes = os.urandom(16 * count)
+        return [
+            str(uuid.UUID(bytes=random_bytes[i:i + 16], version=4))
+            for i in range(0, 16 * count, 16)
+        ]
+
+    @staticmethod
+    def _build_goal(
+        goal_id: str,
+        name: str,
+        description: str,
+        goal_type: str,
+        creator_id: str,
+        chat_id: str,
+        priority: str = "medium",
+        deadline: Optional[datetime] = None,
+        conditions: Optional[Dict[str, Any]] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+        **kwargs,  # 与 create_goal 一致，忽略其他字段
+    ) -> Goal:
+        """Build an unsaved Goal from create_goal-style arguments."""
+        return Goal(
+            goal_id=goal_id,
+            name=name,
+            description=description,
+            goal_type=goal_type,
+            priority=GoalPriority(priority),
+            creator_id=creator_id,
+            chat_id=chat_id,
+            deadline=deadline,
+            conditions=conditions,
+            parameters=parameters,
+        )
+
     def create_goals_batch(self, goals_data: List[Dict[str, Any]]) -> List[Goal]:
         """Batch create goals.
 
@@ -378,14 +461,31 @@ class GoalManager:
             Exception: If batch creation fails
         """
         created_goals = []
+        rows = []
 
         try:
-            for data in goals_data:
-                # Remove auto_save parameter if present
-                data.pop('auto_save', None)
-
-                goal = self.create_goal(**data)
+            goal_ids = self._new_goal_ids(len(goals_data))
+            for goal_id, data in zip(goal_ids, goals_data):
+                # 调用方的字典只读不改（auto_save 等多余字段由 _build_goal 忽略）
+                goal = self._build_goal(goal_id, **data)
                 created_goals.append(goal)
+                rows.append({
+                    "goal_id": goal.goal_id,
+                    "name": goal.name,
+                    "description": goal.description,
+                    "goal_type": goal.goal_type,
+                    "priority": goal.priority.value,
+                    "creator_id": goal.creator_id,
+                    "chat_id": goal.chat_id,
+                    "created_at": goal.created_at,
+                    "deadline": goal.deadline,
+                    "conditions": goal.conditions,
+                    "parameters": goal.parameters,
+                })
+
+            # 整批在一个事务中写入（只提交一次）
+            self.db.create_goals(rows)
+            self._bump_version()
 
             logger.info(f"Batch created {len(created_goals)} goals")
             return created_goals
@@ -411,32 +511,84 @@ class GoalManager:
     def get_all_goals(
         self,
         chat_id: Optional[str] = None,
-        status: Optional[GoalStatus] = None
+        status: Optional[GoalStatus] = None,
+        has_time_window: bool = False,
+        created_date: Optional[str] = None
     ) -> List[Goal]:
         """Get all goals with optional filtering.
 
         Args:
             chat_id: Filter by chat ID
             status: Filter by status
+            has_time_window: Only return schedule goals (with time_window)
+            created_date: Only return goals created on this date (YYYY-MM-DD)
 
         Returns:
             List of Goal objects
         """
         status_str = status.value if status else None
-        goals_data = self.db.get_all_goals(chat_id=chat_id, status=status_str)
+        goals_data = self.db.get_all_goals(
+            chat_id=chat_id,
+            status=status_str,
+            has_time_window=has_time_window,
+            created_date=created_date,
+        )
 
         return [Goal.from_dict(data) for data in goals_data]
 
-    def get_active_goals(self, chat_id: Optional[str] = None) -> List[Goal]:
+    def get_active_goals(
+        self,
+        chat_id: Optional[str] = None,
+        has_time_window: bool = False,
+        created_date: Optional[str] = None
+    ) -> List[Goal]:
         """Get active goals.
 
         Args:
             chat_id: Optional chat ID filter
+            has_time_window: Only return schedule goals (with time_window)
+            created_date: Only return goals created on this date (YYYY-MM-DD)
 
         Returns:
             List of active Goal objects
         """
-        return self.get_all_goals(chat_id=chat_id, status=GoalStatus.ACTIVE)
+        return self.get_all_goals(
+            chat_id=chat_id,
+            status=GoalStatus.ACTIVE,
+            has_time_window=has_time_window,
+            created_date=created_date,
+        )
+
+    def has_schedule_for_date(self, date_str: str, chat_id: str = "global") -> bool:
+        """Check whether a chat has any active schedule goal created on a date.
+
+        The answer is memoized per data version, so repeated checks between
+        goal changes cost a dict lookup; a miss runs a LIMIT 1 query without
+        building Goal objects.
+
+        Args:
+            date_str: Date string (YYYY-MM-DD)
+            chat_id: Chat identifier (default: "global")
+
+        Returns:
+            True if at least one active goal with a time_window exists
+        """
+        key = (chat_id, date_str)
+        # 先读版本号再查询：查询期间若数据变化，记录的是旧版本号，下次会重新查询
+        version = self.version
+        cached = self._schedule_dates.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        exists = bool(self.db.get_all_goals(
+            chat_id=chat_id,
+            status=GoalStatus.ACTIVE.value,
+            limit=1,
+            has_time_window=True,
+            created_date=date_str,
+        ))
+        self._schedule_dates[key] = (version, exists)
+        return exists
 
     def get_executable_goals(self) -> List[Goal]:
         """Get goals that should be executed now.
@@ -445,7 +597,8 @@ class GoalManager:
             List of executable Goal objects
         """
         active_goals = self.get_active_goals()
-        return [g for g in active_goals if g.should_execute_now()]
+        now = self.tz_manager.get_now()
+        return [g for g in active_goals if g.should_execute_now(now)]
 
     def get_schedule_goals(
         self,
@@ -464,29 +617,12 @@ class GoalManager:
         if date_str is None:
             date_str = self.tz_manager.get_now().strftime("%Y-%m-%d")
 
-        goals = self.get_all_goals(chat_id=chat_id)
-        schedule_goals = []
-
-        for goal in goals:
-            # Check for time_window in parameters or conditions
-            has_time_window = False
-            if goal.parameters and "time_window" in goal.parameters:
-                has_time_window = True
-            elif goal.conditions and "time_window" in goal.conditions:
-                has_time_window = True
-
-            if has_time_window:
-                # Check creation date
-                goal_date = None
-                if goal.created_at:
-                    try:
-                        goal_date = goal.created_at.strftime("%Y-%m-%d")
-                    except Exception:
-                        pass
-
-                # Only return goals for specified date
-                if goal_date == date_str:
-                    schedule_goals.append(goal)
+        # Filter by time_window and creation date in the database
+        schedule_goals = self.get_all_goals(
+            chat_id=chat_id,
+            has_time_window=True,
+            created_date=date_str,
+        )
 
         # 去重：按 (name, time_window) 去重，防止重复日程显示
         # 如果有多个相同名称和时间的日程，只保留第一个（通常是最先创建的）
@@ -528,7 +664,10 @@ class GoalManager:
         Returns:
             True if updated, False if not found
         """
-        return self.db.update_goal(goal_id, **kwargs)
+        updated = self.db.update_goal(goal_id, **kwargs)
+        if updated:
+            self._bump_version()
+        return updated
 
     def update_goal_status(self, goal_id: str, status: GoalStatus) -> bool:
         """Update goal status.
@@ -610,6 +749,7 @@ class GoalManager:
         """
         deleted = self.db.delete_goal(goal_id)
         if deleted:
+            self._bump_version()
             logger.debug(f"Deleted goal: {goal_id}")
         return deleted
 
@@ -624,21 +764,14 @@ class GoalManager:
         """
         cutoff_date = self.tz_manager.get_now() - timedelta(days=days)
 
-        # Delete old completed goals
-        completed_count = self.db.delete_goals_by_status(
-            status=GoalStatus.COMPLETED.value,
-            older_than=cutoff_date
-        )
-
-        # Delete old cancelled goals
-        cancelled_count = self.db.delete_goals_by_status(
-            status=GoalStatus.CANCELLED.value,
+        # Delete old completed/cancelled goals in one statement
+        total = self.db.delete_goals_by_statuses(
+            [GoalStatus.COMPLETED.value, GoalStatus.CANCELLED.value],
             older_than=cutoff_date
         )
 
-        total = completed_count + cancelled_count
-
         if total > 0:
+            self._bump_version()
             logger.info(f"Cleaned up {total} old goals (older than {days} days)")
 
         return total
@@ -687,6 +820,35 @@ class GoalManager:
 
         return expired_count
 
+    def cleanup_once(self, days: int = 30) -> Tuple[int, int]:
+        """One-pass cleanup: expire old schedules and delete old finished goals.
+
+        Combines cleanup_expired_schedules() and cleanup_old_goals() into a
+        single database transaction instead of one transaction per goal.
+
+        Args:
+            days: Keep completed/cancelled goals from last N days (default: 30)
+
+        Returns:
+            (expired schedule count, deleted goal count)
+        """
+        now = self.tz_manager.get_now()
+        expired_count, deleted_count = self.db.cleanup_goals(
+            expire_before_date=now.strftime("%Y-%m-%d"),
+            delete_statuses=[GoalStatus.COMPLETED.value, GoalStatus.CANCELLED.value],
+            delete_older_than=now - timedelta(days=days),
+            expired_status=GoalStatus.COMPLETED.value,
+        )
+
+        if expired_count or deleted_count:
+            self._bump_version()
+            logger.debug(
+                f"Cleanup once: {expired_count} expired schedules, "
+                f"{deleted_count} old goals (older than {days} days)"
+            )
+
+        return expired_count, deleted_count
+
     def mark_goal_executed(self, goal_id: str):
         """Mark goal as executed.
 
@@ -716,19 +878,22 @@ class GoalManager:
         if not goals:
             return "📋 当前没有任何目标"
 
-        # Group by status
-        active = [g for g in goals if g.status == GoalStatus.ACTIVE]
-        paused = [g for g in goals if g.status == GoalStatus.PAUSED]
-        completed = [g for g in goals if g.status == GoalStatus.COMPLETED]
+        # Group by status (single pass)
+        by_status: Dict[GoalStatus, List[Goal]] = {}
+        for goal in goals:
+            by_status.setdefault(goal.status, []).append(goal)
+        active = by_status.get(GoalStatus.ACTIVE, [])
+        paused = by_status.get(GoalStatus.PAUSED, [])
+        completed = by_status.get(GoalStatus.COMPLETED, [])
 
         lines = [f"📋 目标总览 (共 {len(goals)} 个)\n"]
 
         if active:
             lines.append(f"🟢 活跃目标 ({len(active)}个):")
             # 🐛 修复：按优先级排序（high > medium > low）
-            priority_order = {"high": 0, "medium": 1, "low": 2}
-            for goal in sorted(active, key=lambda g: priority_order.get(g.priority.value, 1)):
-                lines.append(goal.get_summary())
+            now = self.tz_manager.get_now()
+            for goal in sorted(active, key=lambda g: _PRIORITY_ORDER[g.priority]):
+                lines.append(goal.get_summary(now))
                 lines.append("")
 
         if paused:
@@ -761,6 +926,7 @@ class GoalManager:
 
 # Global singleton
 _goal_manager: Optional[GoalManager] = None
+_goal_manager_lock = threading.Lock()
 
 
 def get_goal_manager() -> GoalManager:
@@ -771,5 +937,8 @@ def get_goal_manager() -> GoalManager:
     """
     global _goal_manager
     if _goal_manager is None:
-        _goal_manager = GoalManager()
+        # 首次创建可能发生在预热线程中，加锁保证只打开一次数据库
+        with _goal_manager_lock:
+            if _goal_manager is None:
+                _goal_manager = GoalManager()
     return _goal_manager
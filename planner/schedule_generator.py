@@ -385,7 +385,8 @@ class ScheduleGenerator:
 
         # 批量创建目标
         if goals_data:
-            created_goals = self.goal_manager.create_goals_batch(goals_data)
+            # 写库（含 fsync）放到线程池执行，避免阻塞事件循环
+            created_goals = await asyncio.to_thread(self.goal_manager.create_goals_batch, goals_data)
             created_goal_ids = [g.goal_id for g in created_goals]
             logger.info(f"✅ 批量创建了 {len(created_goal_ids)} 个目标")
             return created_goal_ids
@@ -10,6 +10,7 @@ from .tools import ManageGoalTool, GetPlanningStatusTool, GenerateScheduleTool,
 from .handlers import AutonomousPlannerEventHandler, ScheduleInjectEventHandler
 from .commands import PlanningCommand
 from .planner.auto_scheduler import ScheduleAutoScheduler
+from .planner.goal_manager import get_goal_manager
 
 logger = get_logger("autonomous_planning")
 
@@ -238,11 +239,23 @@ class AutonomousPlanningPlugin(BasePlugin):
         super().__init__(*args, **kwargs)
         self.scheduler = None
         logger.debug("自主规划插件初始化完成")
-        # 延迟启动调度器，确保插件系统完全初始化
-        asyncio.create_task(self._start_scheduler_after_delay())
+        # 延迟启动调度器，确保插件系统完全初始化（持有任务引用防止被垃圾回收，完成后释放）
+        self._scheduler_start_task = asyncio.create_task(self._start_scheduler_after_delay())
+        self._scheduler_start_task.add_done_callback(self._clear_scheduler_start_task)
+
+    def _clear_scheduler_start_task(self, task: asyncio.Task) -> None:
+        """调度器启动任务完成回调：释放任务引用"""
+        if self._scheduler_start_task is task:
+            self._scheduler_start_task = None
 
     async def _start_scheduler_after_delay(self):
         """延迟启动调度器（10秒后）"""
+        # 等待期间先在线程中打开目标数据库（备份 + 结构初始化），避免首次访问时阻塞事件循环
+        # 预热失败不影响调度器启动（首次访问时会再次尝试初始化）
+        try:
+            await asyncio.to_thread(get_goal_manager)
+        except Exception as e:
+            logger.warning(f"目标数据库预热失败，将在首次访问时重试: {e}")
         await asyncio.sleep(10)
         self.scheduler = ScheduleAutoScheduler(self)
         await self.scheduler.start()
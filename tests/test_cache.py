@@ -0,0 +1,62 @@
+"""缓存模块单元测试
+
+测试 cache/lru_cache.py 中的 LRUCache 与 FrequencyAwareLRUCache
+"""
+
+import importlib
+import unittest
+import sys
+from pathlib import Path
+
+# 添加插件所在目录到路径（按包导入，缓存模块依赖 MaiCore 的日志模块）
+plugin_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(plugin_dir.parent))
+
+try:
+    lru_cache = importlib.import_module(f"{plugin_dir.name}.cache.lru_cache")
+except ModuleNotFoundError as e:
+    if e.name != "src" and not e.name.startswith("src."):
+        raise
+    raise unittest.SkipTest(f"需要 MaiCore 运行环境: {e}")
+
+
+class TestFrequencyAwareLRUCache(unittest.TestCase):
+    """测试 FrequencyAwareLRUCache 类"""
+
+    def test_hot_key_survives_one_shot_burst(self):
+        """测试热点键在一批一次性键的冲刷下仍被保留"""
+        cache = lru_cache.FrequencyAwareLRUCache(max_size=10, ttl=300)
+        cache["hot"] = "schedule"
+        for _ in range(5):
+            self.assertEqual(cache.get_sync("hot"), "schedule")
+
+        for i in range(50):
+            cache[f"one_shot_{i}"] = i
+
+        self.assertIn("hot", cache)
+        self.assertEqual(len(cache.cache), 10)
+
+    def test_plain_lru_evicts_hot_key(self):
+        """对照：纯LRU在同样的访问序列下会淘汰热点键"""
+        cache = lru_cache.LRUCache(max_size=10, ttl=300)
+        cache["hot"] = "schedule"
+        for _ in range(5):
+            cache.get_sync("hot")
+
+        for i in range(50):
+            cache[f"one_shot_{i}"] = i
+
+        self.assertNotIn("hot", cache)
+
+    def test_hits_reset_when_key_evicted(self):
+        """测试被淘汰的键重新写入后命中次数从零开始"""
+        cache = lru_cache.FrequencyAwareLRUCache(max_size=4, ttl=300)
+        for i in range(5):
+            cache[i] = i
+        evicted = [i for i in range(5) if i not in cache]
+        self.assertEqual(len(evicted), 1)
+        self.assertNotIn(evicted[0], cache._hits)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""目标数据库单元测试
+
+测试 database/goal_db.py 中的 GoalDatabase（使用临时SQLite文件）
+"""
+
+import importlib
+import json
+import sqlite3
+import tempfile
+import unittest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 添加插件所在目录到路径（按包导入，数据库模块依赖 MaiCore 的日志模块）
+plugin_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(plugin_dir.parent))
+
+try:
+    goal_db = importlib.import_module(f"{plugin_dir.name}.database.goal_db")
+    goal_manager = importlib.import_module(f"{plugin_dir.name}.planner.goal_manager")
+except ModuleNotFoundError as e:
+    if e.name != "src" and not e.name.startswith("src."):
+        raise
+    raise unittest.SkipTest(f"需要 MaiCore 运行环境: {e}")
+
+
+def _goal_kwargs(goal_id, **overrides):
+    """构造一组填满所有列的目标参数"""
+    kwargs = {
+        "goal_id": goal_id,
+        "name": f"目标{goal_id}",
+        "description": "描述",
+        "goal_type": "schedule",
+        "priority": "high",
+        "creator_id": "user_1",
+        "chat_id": "chat_1",
+        "status": "paused",
+        "created_at": datetime(2026, 10, 15, 8, 0),
+        "deadline": datetime(2026, 10, 16, 8, 0),
+        "conditions": {"time_window": [540, 600]},
+        "parameters": {"time_window": [540, 600], "tags": ["学习", "专注"]},
+        "progress": 40,
+        "last_executed_at": datetime(2026, 10, 15, 9, 0),
+        "execution_count": 3,
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
+class GoalDatabaseTestCase(unittest.TestCase):
+    """每个测试使用独立的临时数据库"""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.data_dir = Path(temp_dir.name)
+        self.db = goal_db.GoalDatabase(db_path=str(self.data_dir / "goals.db"), backup_on_init=False)
+        self.addCleanup(self.db.close)
+
+
+class TestCreateGoals(GoalDatabaseTestCase):
+    """测试 create_goals 批量写入"""
+
+    def test_batch_round_trips_every_column(self):
+        """测试批量写入的每一列都能原样读回"""
+        goals = [_goal_kwargs("g1"), _goal_kwargs("g2", status="active", deadline=None, conditions=None)]
+        self.assertEqual(self.db.create_goals(goals), ["g1", "g2"])
+
+        for expected in goals:
+            row = self.db.get_goal(expected["goal_id"])
+            for column in ("goal_id", "name", "description", "goal_type", "priority",
+                           "creator_id", "chat_id", "status", "conditions", "parameters",
+                           "progress", "execution_count"):
+                self.assertEqual(row[column], expected[column], column)
+            for column in ("created_at", "deadline", "last_executed_at"):
+                value = expected[column]
+                self.assertEqual(row[column], value.isoformat() if value else None, column)
+            self.assertIsNone(row["interval_seconds"])
+            self.assertIsNotNone(row["updated_at"])
+
+    def test_failing_row_rolls_back_batch(self):
+        """测试批量中任一行失败时整批都不写入"""
+        self.db.create_goal(**_goal_kwargs("existing"))
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.create_goals([_goal_kwargs("new_1"), _goal_kwargs("existing"), _goal_kwargs("new_2")])
+
+        self.assertEqual(self.db.count_goals(), 1)
+        self.assertIsNone(self.db.get_goal("new_1"))
+
+    def test_manager_batch_bumps_version_once(self):
+        """测试 GoalManager.create_goals_batch 一次写入并只递增一次版本号"""
+        manager = goal_manager.GoalManager(data_dir=str(self.data_dir), db_name="manager.db")
+        self.addCleanup(manager.db.close)
+        goals_data = [
+            {"name": "学习", "description": "看书", "goal_type": "schedule", "priority": "high",
+             "creator_id": "user_1", "chat_id": "chat_1", "parameters": {"time_window": [540, 600]}},
+            {"name": "运动", "description": "跑步", "goal_type": "schedule", "priority": "low",
+             "creator_id": "user_1", "chat_id": "chat_1", "parameters": {"time_window": [1080, 1140]}},
+        ]
+
+        created = manager.create_goals_batch(goals_data)
+
+        self.assertEqual(manager.version, 1)
+        self.assertNotIn("goal_id", goals_data[0])
+        for goal, data in zip(created, goals_data):
+            stored = manager.get_goal(goal.goal_id)
+            self.assertEqual(stored.name, data["name"])
+            self.assertEqual(stored.priority.value, data["priority"])
+            self.assertEqual(stored.parameters, data["parameters"])
+
+
+class TestDeleteGoalsByStatuses(GoalDatabaseTestCase):
+    """测试 delete_goals_by_statuses 按状态和创建时间批量删除"""
+
+    def test_deletes_only_matching_old_goals(self):
+        """测试只删除截止时间前创建的已完成/已取消目标，并返回删除数量"""
+        old = datetime(2026, 9, 1, 8, 0)
+        recent = datetime(2026, 10, 15, 8, 0)
+        self.db.create_goals([
+            _goal_kwargs("old_completed", status="completed", created_at=old),
+            _goal_kwargs("old_cancelled", status="cancelled", created_at=old),
+            _goal_kwargs("old_active", status="active", created_at=old),
+            _goal_kwargs("old_paused", status="paused", created_at=old),
+            _goal_kwargs("recent_completed", status="completed", created_at=recent),
+            _goal_kwargs("recent_cancelled", status="cancelled", created_at=recent),
+        ])
+
+        deleted = self.db.delete_goals_by_statuses(
+            ["completed", "cancelled"], older_than=datetime(2026, 10, 1)
+        )
+
+        self.assertEqual(deleted, 2)
+        remaining = {goal["goal_id"] for goal in self.db.get_all_goals()}
+        self.assertEqual(remaining, {"old_active", "old_paused", "recent_completed", "recent_cancelled"})
+
+    def test_empty_statuses_deletes_nothing(self):
+        """测试状态列表为空时不执行删除"""
+        self.db.create_goal(**_goal_kwargs("g1", status="completed"))
+        self.assertEqual(self.db.delete_goals_by_statuses([]), 0)
+        self.assertEqual(self.db.count_goals(), 1)
+
+
+class TestJsonColumns(unittest.TestCase):
+    """测试 conditions/parameters 列的JSON序列化（orjson 与标准库 json 两条路径）"""
+
+    PAYLOADS = [
+        {"time_window": [540, 600]},
+        {"time_window": [1380, 1500], "tags": ["学习", "专注"], "weight": 0.25, "enabled": True, "note": None},
+        {"nested": {"level": {"items": [1, 2.5, "引号\"与\\反斜杠"]}}},
+    ]
+
+    def test_std_path_round_trips(self):
+        """测试标准库路径能原样读回"""
+        for payload in self.PAYLOADS:
+            self.assertEqual(json.loads(goal_db._std_json_dumps(payload)), payload)
+
+    @unittest.skipIf(goal_db.orjson is None, "orjson 未安装")
+    def test_orjson_path_matches_std_path(self):
+        """测试 orjson 路径与标准库路径写出相同文本，且两边互相可读"""
+        for payload in self.PAYLOADS:
+            text = goal_db._json_dumps(payload)
+            self.assertEqual(text, goal_db._std_json_dumps(payload))
+            self.assertEqual(goal_db._json_loads(text), payload)
+            self.assertEqual(json.loads(text), payload)
+        # 非字符串键两边都转换为字符串
+        self.assertEqual(goal_db._json_dumps({1: "a"}), goal_db._std_json_dumps({1: "a"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""关键词匹配器单元测试
+
+测试 utils/keyword_matcher.py 中的 KeywordMatcher
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# 添加父目录到路径
+plugin_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(plugin_dir))
+
+# 导入被测模块
+from utils.keyword_matcher import CategoryMatcher, KeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    """测试 KeywordMatcher 类"""
+
+    def test_keywords_sorted_longest_first(self):
+        """测试关键词按长度降序排列（确定性）"""
+        matcher = KeywordMatcher({"在", "在做", "现在"})
+        self.assertEqual(matcher.keywords, ("在做", "现在", "在"))
+
+    def test_search_hit(self):
+        """测试命中关键词"""
+        matcher = KeywordMatcher({"今天", "日程"})
+        self.assertEqual(matcher.search("今天有什么安排"), "今天")
+
+    def test_search_miss(self):
+        """测试未命中"""
+        matcher = KeywordMatcher({"今天", "日程"})
+        self.assertIsNone(matcher.search("你好呀"))
+
+    def test_first_char_prefilter(self):
+        """测试首字符预过滤：含首字符但不构成关键词时仍正确未命中"""
+        matcher = KeywordMatcher({"今天", "日程"})
+        self.assertEqual(matcher.first_chars, frozenset({"今", "日"}))
+        self.assertIsNone(matcher.search("今晚吃什么"))
+        self.assertEqual(matcher.find_all("abc"), set())
+
+    def test_empty_input(self):
+        """测试空文本和空关键词集合"""
+        self.assertIsNone(KeywordMatcher({"今天"}).search(""))
+        self.assertIsNone(KeywordMatcher(set()).search("今天"))
+
+    def test_special_characters_escaped(self):
+        """测试正则特殊字符被转义"""
+        matcher = KeywordMatcher({"c++", "?"})
+        self.assertEqual(matcher.search("学c++吗"), "c++")
+
+    def test_find_all_overlapping(self):
+        """测试重叠关键词全部被找到（"晚上好"同时包含"晚上"）"""
+        matcher = KeywordMatcher({"晚上", "晚上好", "上好"})
+        self.assertEqual(matcher.find_all("晚上好呀"), {"晚上", "晚上好", "上好"})
+
+
+class TestCategoryMatcher(unittest.TestCase):
+    """测试 CategoryMatcher 类"""
+
+    def setUp(self):
+        self.matcher = CategoryMatcher({
+            "future_query": {"晚上", "明天"},
+            "greeting": {"晚上好", "你好"},
+            "tech": {"报错"},
+        })
+
+    def test_single_pass_multiple_categories(self):
+        """测试一次扫描命中多个类别"""
+        self.assertEqual(
+            self.matcher.classify("晚上好，明天见"),
+            frozenset({"future_query", "greeting"}),
+        )
+
+    def test_no_match(self):
+        """测试未命中任何类别"""
+        self.assertEqual(self.matcher.classify("随便聊聊"), frozenset())
+
+
+if __name__ == "__main__":
+    unittest.main()
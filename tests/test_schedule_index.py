@@ -0,0 +1,161 @@
+"""日程区间索引单元测试
+
+测试 handlers/handlers.py 中 ScheduleInjectEventHandler 的当前活动/后续活动查询
+（_get_current_schedule 基于 _DayIndex 的查找）
+"""
+
+import importlib
+import unittest
+import sys
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# 添加插件所在目录到路径（按包导入，处理器模块依赖 MaiCore 的插件系统）
+plugin_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(plugin_dir.parent))
+
+try:
+    handlers_module = importlib.import_module(f"{plugin_dir.name}.handlers.handlers")
+except ModuleNotFoundError as e:
+    if e.name != "src" and not e.name.startswith("src."):
+        raise
+    raise unittest.SkipTest(f"需要 MaiCore 运行环境: {e}")
+
+TODAY = date(2026, 10, 15)
+TODAY_MORNING = datetime(2026, 10, 15, 7, 0)
+YESTERDAY_MORNING = datetime(2026, 10, 14, 7, 0)
+
+
+def _goal(name, time_window, created_at=TODAY_MORNING):
+    """构造只含索引所需字段的目标"""
+    return SimpleNamespace(
+        name=name,
+        description=f"{name}的描述",
+        goal_type="schedule",
+        created_at=created_at,
+        parameters={"time_window": time_window},
+        conditions={},
+    )
+
+
+class TestScheduleIndex(unittest.TestCase):
+    """测试基于区间索引的当前活动与后续活动查询"""
+
+    def setUp(self):
+        handler_cls = handlers_module.ScheduleInjectEventHandler
+        self.handler = handler_cls.__new__(handler_cls)
+        self.handler._schedule_cache = handlers_module.FrequencyAwareLRUCache(max_size=10, ttl=300)
+        self.handler._day_index = OrderedDict()
+        self.handler._day_index_max_size = 10
+        self.handler._day_index_generation = ("", -1)
+        self.handler._today_str_state = (-1, "")
+        self.minute = 0
+        self.handler._get_local_day_minute = lambda: (TODAY.toordinal(), self.minute)
+        self.goals = []
+        self.chat_goals = {}
+        self.goal_manager = goal_manager = SimpleNamespace(
+            version=1,
+            get_active_goals=lambda chat_id: self.goals if chat_id == "global" else self.chat_goals.get(chat_id, []),
+        )
+        patcher = mock.patch.object(handlers_module, "get_goal_manager", return_value=goal_manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def query(self, minute, chat_id="chat_1"):
+        """在指定分钟查询（清空结果缓存，区间索引保留）"""
+        self.minute = minute
+        self.handler._schedule_cache.clear()
+        activity, _, future, _ = self.handler._get_current_schedule(chat_id)
+        return activity, list(future)
+
+    def test_overnight_window(self):
+        """测试跨夜窗口（23:00-01:00）在当晚和次日凌晨都被识别为当前活动"""
+        self.goals = [_goal("熬夜看书", [1380, 1500])]
+        self.assertEqual(self.query(30)[0], "熬夜看书")
+        self.handler._day_index.clear()
+        self.assertEqual(self.query(1400)[0], "熬夜看书")
+        self.handler._day_index.clear()
+        self.assertIsNone(self.query(90)[0])
+
+    def test_overlap_prefers_latest_created(self):
+        """测试重叠活动取创建时间最新的"""
+        self.goals = [
+            _goal("学习", [540, 720], datetime(2026, 10, 15, 8, 0)),
+            _goal("开会", [600, 660], datetime(2026, 10, 15, 9, 0)),
+        ]
+        self.assertEqual(self.query(630)[0], "开会")
+
+    def test_overlap_same_created_prefers_earlier_start(self):
+        """测试重叠活动创建时间相同时取开始时间靠前的"""
+        self.goals = [
+            _goal("开会", [600, 660]),
+            _goal("学习", [540, 720]),
+        ]
+        self.assertEqual(self.query(630)[0], "学习")
+
+    def test_no_current_activity(self):
+        """测试当前时间没有活动（空档期、非今天创建的活动）"""
+        self.goals = [
+            _goal("早餐", [480, 540]),
+            _goal("旧日程", [660, 780], YESTERDAY_MORNING),
+            _goal("午睡", [780, 840]),
+        ]
+        activity, future = self.query(720)
+        self.assertIsNone(activity)
+        self.assertEqual(future, [("13:00", "午睡")])
+
+    def test_future_list_after_cutoff(self):
+        """测试索引在截止时间构建后，后续查询的未来活动列表"""
+        self.goals = [
+            _goal("早餐", [480, 540]),
+            _goal("学习", [600, 660]),
+            _goal("散步", [700, 760]),
+            _goal("写作", [900, 960]),
+        ]
+        activity, future = self.query(620)
+        self.assertEqual(activity, "学习")
+        self.assertEqual(future, [("11:40", "散步"), ("15:00", "写作")])
+
+        # 复用同一索引：之后的查询只看到仍未开始的活动
+        activity, future = self.query(800)
+        self.assertIsNone(activity)
+        self.assertEqual(future, [("15:00", "写作")])
+
+    def test_global_index_shared_by_chats(self):
+        """测试有全局日程时各聊天共用同一份全局索引，没有时才使用聊天自己的日程"""
+        self.goals = [_goal("学习", [600, 660])]
+        self.chat_goals = {"chat_2": [_goal("聊天日程", [600, 660])]}
+        self.assertEqual(self.query(620, "chat_1")[0], "学习")
+        self.assertEqual(self.query(620, "chat_2")[0], "学习")
+        self.assertEqual(list(self.handler._day_index), ["global"])
+
+        self.goals = []
+        self.handler._day_index.clear()
+        self.assertEqual(self.query(620, "chat_2")[0], "聊天日程")
+
+    def test_index_cache_is_bounded(self):
+        """测试按聊天的索引数量不超过上限"""
+        self.chat_goals = {f"chat_{i}": [_goal(f"活动{i}", [600, 660])] for i in range(30)}
+        for i in range(30):
+            self.assertEqual(self.query(620, f"chat_{i}")[0], f"活动{i}")
+        self.assertEqual(len(self.handler._day_index), self.handler._day_index_max_size)
+        self.assertIn("chat_29", self.handler._day_index)
+
+    def test_version_change_clears_index(self):
+        """测试目标数据版本变化后旧索引（包括不活跃聊天的）被清空并按新数据重建"""
+        self.chat_goals = {"chat_1": [_goal("旧活动", [600, 660])], "chat_2": [_goal("活动", [600, 660])]}
+        self.query(620, "chat_1")
+        self.query(620, "chat_2")
+        self.assertIn("chat_1", self.handler._day_index)
+
+        self.chat_goals["chat_2"] = [_goal("新活动", [600, 660])]
+        self.goal_manager.version = 2
+        self.assertEqual(self.query(620, "chat_2")[0], "新活动")
+        self.assertNotIn("chat_1", self.handler._day_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,7 @@ from utils.time_utils import (
     time_slot_to_minutes,
     format_minutes_to_time,
     get_time_window_from_goal,
+    get_raw_time_window,
 )
 
 
@@ -94,6 +95,27 @@ class TestFormatMinutesToTime(unittest.TestCase):
         self.assertEqual(result, "23:59")
 
 
+class TestGetRawTimeWindow(unittest.TestCase):
+    """测试 get_raw_time_window 函数"""
+
+    def test_parameters_first(self):
+        """测试优先读取 parameters"""
+        goal = MockGoal("学习", [540, 630])
+        goal.conditions = {"time_window": [600, 660]}
+        self.assertEqual(get_raw_time_window(goal), [540, 630])
+
+    def test_fallback_to_conditions(self):
+        """测试回退读取 conditions"""
+        goal = MockGoal("学习")
+        goal.conditions = {"time_window": [9, 10]}
+        self.assertEqual(get_raw_time_window(goal), [9, 10])
+        self.assertEqual(get_time_window_from_goal(goal), (540, 600))
+
+    def test_missing(self):
+        """测试没有时间窗口"""
+        self.assertIsNone(get_raw_time_window(MockGoal("学习")))
+
+
 class MockGoal:
     """模拟 Goal 对象"""
 
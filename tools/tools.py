@@ -403,7 +403,6 @@ class GetPlanningStatusTool(BaseTool):
     async def execute(self, function_args: Dict[str, Any]) -> Dict[str, Any]:
         """查询并返回规划系统状态（简洁日程格式）"""
         try:
-            from datetime import datetime
             goal_manager = get_goal_manager()
             detailed = function_args.get("detailed", False)
 
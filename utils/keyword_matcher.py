@@ -0,0 +1,132 @@
+"""Keyword Matcher Utilities.
+
+This module provides multi-keyword matchers used by the schedule inject
+pipeline to scan short chat messages for keywords in a single pass.
+
+The matcher uses an Aho-Corasick automaton when ``pyahocorasick`` is
+installed, and falls back to a precompiled regex alternation otherwise.
+Keywords are sorted longest-first so the fallback regex is deterministic
+and prefers the longest keyword at any given position. Messages that contain
+none of the keywords' first characters are rejected before either scan runs.
+
+Example:
+    >>> from utils.keyword_matcher import KeywordMatcher, CategoryMatcher
+    >>> matcher = KeywordMatcher({"现在", "今天", "在做"})
+    >>> matcher.search("你现在在做什么")
+    '现在'
+    >>> categories = CategoryMatcher({"greeting": {"你好"}, "tech": {"报错"}})
+    >>> sorted(categories.classify("你好，程序报错了"))
+    ['greeting', 'tech']
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+try:
+    import ahocorasick
+except ImportError:  # 可选依赖，未安装时回退到正则
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """多关键词匹配器（构建一次，重复使用）
+
+    Args:
+        keywords: 关键词集合
+
+    Attributes:
+        keywords: 按长度降序排列的关键词元组
+        first_chars: 所有关键词首字符的集合，用于快速排除不含任何关键词的文本
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # 长关键词优先，保证正则回退路径确定且不被短前缀抢先匹配
+        self.keywords = tuple(sorted(set(keywords), key=lambda kw: (-len(kw), kw)))
+        self.first_chars = frozenset(keyword[0] for keyword in self.keywords if keyword)
+        alternation = "|".join(map(re.escape, self.keywords))
+        self._pattern = re.compile(alternation)
+        # 零宽前瞻：在每个位置取最长关键词，用于回退路径的全量匹配
+        self._overlap_pattern = re.compile(f"(?=({alternation}))")
+        # 每个关键词包含的所有关键词（自身及其子串），补全被最长匹配遮蔽的短关键词
+        self._contained = {
+            keyword: frozenset(other for other in self.keywords if other in keyword)
+            for keyword in self.keywords
+        }
+        self._automaton = None
+
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def search(self, text: str) -> Optional[str]:
+        """查找文本中出现的第一个关键词
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            匹配到的关键词，未匹配则返回None
+        """
+        # 大多数消息不含任何关键词首字符，直接排除（isdisjoint 在C层遍历文本）
+        if not text or self.first_chars.isdisjoint(text):
+            return None
+
+        if self._automaton is not None:
+            for _, keyword in self._automaton.iter(text):
+                return keyword
+            return None
+
+        match = self._pattern.search(text)
+        return match.group() if match else None
+
+    def find_all(self, text: str) -> Set[str]:
+        """查找文本中出现的所有关键词（含重叠出现）
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            出现过的关键词集合
+        """
+        if not text or self.first_chars.isdisjoint(text):
+            return set()
+
+        if self._automaton is not None:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+
+        found: Set[str] = set()
+        for match in self._overlap_pattern.finditer(text):
+            found |= self._contained[match.group(1)]
+        return found
+
+
+class CategoryMatcher:
+    """带类别标签的多关键词匹配器，一次扫描得到所有命中的类别
+
+    Args:
+        categories: {类别名: 关键词集合}，同一关键词可属于多个类别
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self._keyword_categories: Dict[str, Set[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self._keyword_categories.setdefault(keyword, set()).add(category)
+        self._matcher = KeywordMatcher(self._keyword_categories)
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        """返回文本命中的类别集合
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            命中的类别集合
+        """
+        flags: Set[str] = set()
+        for keyword in self._matcher.find_all(text):
+            flags |= self._keyword_categories[keyword]
+        return frozenset(flags)
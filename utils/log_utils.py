@@ -0,0 +1,28 @@
+"""Logging Utility Functions.
+
+Shared helpers for skipping expensive log-message formatting on hot paths.
+
+Example:
+    >>> from utils.log_utils import is_log_enabled
+    >>> if is_log_enabled(logger, logging.DEBUG):
+    ...     logger.debug(f"匹配结果: {expensive_summary()}")
+"""
+
+from typing import Any
+
+
+def is_log_enabled(logger: Any, level: int) -> bool:
+    """Check whether ``logger`` would emit a record at ``level``.
+
+    Loggers without ``isEnabledFor`` (e.g. some host logger wrappers) are
+    treated as enabled, so messages are never silently dropped.
+
+    Args:
+        logger: Logger returned by ``get_logger``
+        level: Standard ``logging`` level such as ``logging.DEBUG``
+
+    Returns:
+        True if the message should be formatted and logged
+    """
+    is_enabled_for = getattr(logger, "isEnabledFor", None)
+    return is_enabled_for is None or is_enabled_for(level)
@@ -16,8 +16,12 @@ Example:
     09:00 - 17:00
 """
 
+import functools
+import logging
 from typing import Any, List, Optional, Tuple, Union
 
+logger = logging.getLogger("autonomous_planning")
+
 
 def migrate_time_window(time_window: Optional[List[Union[int, float]]]) -> Optional[List[int]]:
     """
@@ -41,8 +45,6 @@ def migrate_time_window(time_window: Optional[List[Union[int, float]]]) -> Optio
 
     # 检测无效时间窗口（起止时间相同）
     if start == end:
-        import logging
-        logger = logging.getLogger("autonomous_planning")
         logger.warning(f"无效的时间窗口: {time_window} (起止时间相同)")
         return None
 
@@ -72,12 +74,27 @@ def parse_time_window(time_window: Optional[List[Union[int, float]]]) -> Tuple[O
     Returns:
         (start_minutes, end_minutes) 或 (None, None)
     """
+    # 整数时间窗口（绝大多数情况）走缓存：同一窗口只解析一次
+    if time_window and len(time_window) >= 2:
+        start, end = time_window[0], time_window[1]
+        if type(start) is int and type(end) is int:
+            return _parse_int_time_window(start, end)
+
     migrated = migrate_time_window(time_window)
     if not migrated:
         return None, None
     return migrated[0], migrated[1]
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_int_time_window(start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+    """带缓存的整数时间窗口解析（只缓存 int，避免 9 与 9.0 共用缓存项）"""
+    migrated = migrate_time_window([start, end])
+    if not migrated:
+        return None, None
+    return migrated[0], migrated[1]
+
+
 def parse_time_slot(time_slot: str) -> Tuple[Optional[int], Optional[int]]:
     """
     解析 HH:MM 格式时间字符串为分钟数
@@ -131,6 +148,27 @@ def format_minutes_to_time(minutes: int) -> str:
     return f"{hour:02d}:{minute:02d}"
 
 
+def get_raw_time_window(goal: Any) -> Optional[List[Union[int, float]]]:
+    """
+    从目标对象中读取原始时间窗口（未解析）
+
+    优先从 parameters 读取，其次从 conditions 读取（向后兼容）
+
+    Args:
+        goal: 目标对象
+
+    Returns:
+        原始时间窗口，没有则返回None
+    """
+    parameters = getattr(goal, 'parameters', None)
+    if parameters and "time_window" in parameters:
+        return parameters.get("time_window")
+    conditions = getattr(goal, 'conditions', None)
+    if conditions and "time_window" in conditions:
+        return conditions.get("time_window")
+    return None
+
+
 def get_time_window_from_goal(goal: Any) -> Tuple[int, int]:
     """
     从目标对象中提取时间窗口（统一接口）
@@ -143,13 +181,7 @@ def get_time_window_from_goal(goal: Any) -> Tuple[int, int]:
     Returns:
         (start_minutes, end_minutes) 元组，默认返回 (0, 60)
     """
-    # 优先从parameters读取time_window，其次从conditions读取
-    time_window = None
-    if hasattr(goal, 'parameters') and goal.parameters and "time_window" in goal.parameters:
-        time_window = goal.parameters.get("time_window")
-    elif hasattr(goal, 'conditions') and goal.conditions and "time_window" in goal.conditions:
-        time_window = goal.conditions.get("time_window")
-
+    time_window = get_raw_time_window(goal)
     if not time_window:
         return (0, 60)
 
@@ -4,6 +4,7 @@ This module provides centralized timezone handling functionality,
 eliminating code duplication across multiple modules.
 """
 
+import functools
 from datetime import datetime
 from typing import Optional
 
@@ -12,6 +13,41 @@ from src.common.logger import get_logger
 logger = get_logger("autonomous_planning.timezone_manager")
 
 
+@functools.lru_cache(maxsize=None)
+def _resolve_timezone(timezone_str: str):
+    """解析时区字符串为tzinfo对象（按时区字符串缓存，每个时区只解析一次）
+
+    优先使用标准库 zoneinfo，不可用时回退到 pytz，都失败则返回None。
+
+    Args:
+        timezone_str: 时区字符串（如 "Asia/Shanghai"）
+
+    Returns:
+        tzinfo对象，如果解析失败则返回None
+    """
+    error: Optional[Exception] = None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(timezone_str)
+    except ImportError:
+        pass
+    except Exception as e:
+        error = e  # 时区无效或缺少tzdata，尝试pytz
+
+    try:
+        import pytz
+        return pytz.timezone(timezone_str)
+    except ImportError:
+        if error is None:
+            logger.warning("zoneinfo/pytz模块均不可用，将使用系统时区")
+        else:
+            logger.warning(f"时区初始化失败: {error}，将使用系统时区")
+        return None
+    except Exception as e:
+        logger.warning(f"时区初始化失败: {e}，将使用系统时区")
+        return None
+
+
 class TimezoneManager:
     """时区管理器 - 集中管理时区处理，避免重复代码
 
@@ -39,17 +75,9 @@ class TimezoneManager:
         """初始化时区对象
 
         Returns:
-            pytz时区对象，如果初始化失败则返回None
+            tzinfo对象（zoneinfo或pytz），如果初始化失败则返回None
         """
-        try:
-            import pytz
-            return pytz.timezone(self.timezone_str)
-        except ImportError:
-            logger.warning("pytz模块未安装，将使用系统时区")
-            return None
-        except Exception as e:
-            logger.warning(f"时区初始化失败: {e}，将使用系统时区")
-            return None
+        return _resolve_timezone(self.timezone_str)
 
     def get_now(self) -> datetime:
         """获取当前时间（配置时区）